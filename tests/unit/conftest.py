@@ -0,0 +1,25 @@
+import pytest_asyncio
+
+from voltaire_bundler.utils import eth_client_utils
+
+
+# the unit tests don't need the geth container nor a running bundler
+@pytest_asyncio.fixture(scope="module", autouse=True)
+async def gethDockerContainer():
+    yield
+
+
+@pytest_asyncio.fixture(scope="module", autouse=True)
+async def bundlerInstance():
+    yield
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def eth_client_session():
+    # the shared client session is bound to the event loop of the test
+    eth_client_utils.client_session = None
+    eth_client_utils.eth_clients_without_batch_support.clear()
+    eth_client_utils.latest_block_hashes.clear()
+    yield
+    await eth_client_utils.close_client_session()
+
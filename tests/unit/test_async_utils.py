@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from voltaire_bundler.utils.async_utils import gather_or_cancel
+
+
+@pytest.mark.asyncio
+async def test_gather_or_cancel_returns_results_in_order():
+    async def delayed(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    assert await gather_or_cancel(delayed(1, 0.02), delayed(2, 0)) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_gather_or_cancel_cancels_the_others_on_error():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def failing():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError, match="failed"):
+        await gather_or_cancel(slow(), failing())
+    assert cancelled.is_set()
@@ -0,0 +1,172 @@
+import orjson
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from voltaire_bundler.utils import eth_client_utils
+from voltaire_bundler.utils.eth_client_utils import (
+    send_rpc_batch_request_to_eth_client
+)
+
+
+@pytest.fixture
+def rpc_responses():
+    # maps a JSON-RPC method to a function returning the response to a
+    # request, a "batch" key overrides the response to a whole batch
+    return {}
+
+
+@pytest_asyncio.fixture
+async def eth_client(rpc_responses):
+    received_requests = []
+
+    async def handle(request):
+        json_request = orjson.loads(await request.read())
+        received_requests.append(json_request)
+        if isinstance(json_request, list):
+            if "batch" in rpc_responses:
+                return web.Response(body=orjson.dumps(rpc_responses["batch"](json_request)))
+            return web.Response(
+                body=orjson.dumps(
+                    [
+                        rpc_responses[single_request["method"]](single_request)
+                        for single_request in json_request
+                    ]
+                )
+            )
+        return web.Response(
+            body=orjson.dumps(rpc_responses[json_request["method"]](json_request))
+        )
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/")), received_requests
+    await server.close()
+
+
+def result(value):
+    return lambda request: {"jsonrpc": "2.0", "id": request["id"], "result": value}
+
+
+@pytest.mark.asyncio
+async def test_batch_responses_are_in_request_order(eth_client, rpc_responses):
+    url, received_requests = eth_client
+    rpc_responses["eth_gasPrice"] = result("0x1")
+    rpc_responses["eth_maxPriorityFeePerGas"] = result("0x2")
+    rpc_responses["batch"] = lambda requests: [
+        rpc_responses[request["method"]](request) for request in reversed(requests)
+    ]
+
+    responses = await send_rpc_batch_request_to_eth_client(
+        url, [("eth_gasPrice", None), ("eth_maxPriorityFeePerGas", None)]
+    )
+
+    assert [response["result"] for response in responses] == ["0x1", "0x2"]
+    assert len(received_requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_falls_back_to_single_requests(eth_client, rpc_responses):
+    url, received_requests = eth_client
+    rpc_responses["eth_gasPrice"] = result("0x1")
+    rpc_responses["eth_maxPriorityFeePerGas"] = result("0x2")
+    rpc_responses["batch"] = lambda requests: {
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {"code": -32600, "message": "batch requests are not supported"},
+    }
+    methods_and_params = [("eth_gasPrice", None), ("eth_maxPriorityFeePerGas", None)]
+
+    responses = await send_rpc_batch_request_to_eth_client(url, methods_and_params)
+    assert [response["result"] for response in responses] == ["0x1", "0x2"]
+    assert len(received_requests) == 3
+
+    # the eth client is not sent batch requests anymore
+    responses = await send_rpc_batch_request_to_eth_client(url, methods_and_params)
+    assert [response["result"] for response in responses] == ["0x1", "0x2"]
+    assert len(received_requests) == 5
+    assert url in eth_client_utils.eth_clients_without_batch_support
+
+
+@pytest.mark.asyncio
+async def test_transient_batch_error_keeps_batching(eth_client, rpc_responses):
+    url, received_requests = eth_client
+    rpc_responses["eth_gasPrice"] = result("0x1")
+    rpc_responses["batch"] = lambda requests: {
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {"code": -32005, "message": "rate limit exceeded"},
+    }
+
+    responses = await send_rpc_batch_request_to_eth_client(url, [("eth_gasPrice", None)])
+    assert [response["result"] for response in responses] == ["0x1"]
+    assert url not in eth_client_utils.eth_clients_without_batch_support
+
+    del rpc_responses["batch"]
+    responses = await send_rpc_batch_request_to_eth_client(url, [("eth_gasPrice", None)])
+    assert [response["result"] for response in responses] == ["0x1"]
+    assert isinstance(received_requests[-1], list)
+
+
+@pytest.mark.asyncio
+async def test_single_response_to_a_batch_stops_batching(eth_client, rpc_responses):
+    url, _ = eth_client
+    rpc_responses["eth_gasPrice"] = result("0x1")
+    rpc_responses["batch"] = lambda requests: rpc_responses["eth_gasPrice"](requests[0])
+
+    responses = await send_rpc_batch_request_to_eth_client(url, [("eth_gasPrice", None)])
+
+    assert [response["result"] for response in responses] == ["0x1"]
+    assert url in eth_client_utils.eth_clients_without_batch_support
+
+
+@pytest.mark.asyncio
+async def test_invalid_batch_response_raises(eth_client, rpc_responses):
+    url, _ = eth_client
+    rpc_responses["batch"] = lambda requests: "unexpected"
+
+    with pytest.raises(ValueError, match="Invalid response"):
+        await send_rpc_batch_request_to_eth_client(url, [("eth_gasPrice", None)])
+
+
+@pytest.mark.asyncio
+async def test_missing_batch_response_raises(eth_client, rpc_responses):
+    url, _ = eth_client
+    rpc_responses["eth_gasPrice"] = result("0x1")
+    rpc_responses["batch"] = lambda requests: [
+        rpc_responses["eth_gasPrice"](requests[0])
+    ]
+
+    with pytest.raises(ValueError, match="eth_maxPriorityFeePerGas"):
+        await send_rpc_batch_request_to_eth_client(
+            url, [("eth_gasPrice", None), ("eth_maxPriorityFeePerGas", None)]
+        )
+
+
+@pytest.mark.asyncio
+async def test_batch_response_with_null_id_raises(eth_client, rpc_responses):
+    url, _ = eth_client
+    rpc_responses["batch"] = lambda requests: [
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+    ]
+
+    with pytest.raises(ValueError, match="Missing responses"):
+        await send_rpc_batch_request_to_eth_client(url, [("eth_gasPrice", None)])
+
+
+@pytest.mark.asyncio
+async def test_latest_block_hash_is_only_known_for_the_latest_block(
+    eth_client, rpc_responses
+):
+    url, _ = eth_client
+    rpc_responses["eth_getBlockByNumber"] = result(
+        {"number": "0x10", "hash": "0x" + "ab" * 32, "gasLimit": "0x1c9c380"}
+    )
+
+    await eth_client_utils.fetch_latest_block_info(url)
+
+    assert eth_client_utils.get_latest_block_hash(url, "0x10") == "0x" + "ab" * 32
+    assert eth_client_utils.get_latest_block_hash(url, "0xf") is None
@@ -0,0 +1,93 @@
+import pytest
+
+from voltaire_bundler.bundler.exceptions import ExecutionException
+from voltaire_bundler.bundler.gas_manager import (
+    CALL_GAS_ESTIMATION_ERROR_RATIO_PER_MILLE,
+    CALL_GAS_ESTIMATION_MIN_STEP,
+    MAX_CALL_GAS_LIMIT,
+    MIN_CALL_GAS_LIMIT,
+    GasManager,
+)
+
+SENDER = "0x" + "11" * 20
+
+
+def fake_gas_manager(needed_gas, reported_gas_used):
+    # a node where the call succeeds from needed_gas and always reports
+    # reported_gas_used as the gas used
+    gas_manager = GasManager("http://localhost:8545", 1, False, 100, 100)
+    call_gas_limits = []
+
+    async def get_call_data_gas_used(entrypoint, encoded_params, call_gas_limit, *args):
+        call_gas_limits.append(call_gas_limit)
+        return call_gas_limit >= needed_gas, reported_gas_used, b""
+
+    gas_manager.get_call_data_gas_used = get_call_data_gas_used
+    return gas_manager, call_gas_limits
+
+
+async def estimate(gas_manager):
+    return await gas_manager.estimate_call_gas_limit_binary_search(
+        "0x" + "22" * 20, SENDER, b"", b"\x01", "latest", "0x1", {}
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "needed_gas, reported_gas_used",
+    [
+        # the optimistic gas limit succeeds
+        (50_000, 49_000),
+        (1_000_000, 990_000),
+        # the optimistic gas limit fails
+        (120_000, 60_000),
+        (300_000, 100_000),
+        (1_000_000, 400_000),
+        (5_000_000, 1_000_000),
+        (5_000_000, 60_000),
+        (29_000_000, 100_000),
+    ],
+)
+async def test_call_gas_search_converges_to_the_needed_gas(
+    needed_gas, reported_gas_used
+):
+    gas_manager, _ = fake_gas_manager(needed_gas, reported_gas_used)
+
+    call_gas_limit = await estimate(gas_manager)
+
+    assert needed_gas <= call_gas_limit <= MAX_CALL_GAS_LIMIT
+    assert call_gas_limit - needed_gas <= max(
+        CALL_GAS_ESTIMATION_MIN_STEP,
+        needed_gas * CALL_GAS_ESTIMATION_ERROR_RATIO_PER_MILLE // 1000,
+    )
+
+
+@pytest.mark.asyncio
+async def test_call_gas_search_uses_the_optimistic_gas_limit():
+    gas_manager, call_gas_limits = fake_gas_manager(50_000, 49_000)
+
+    call_gas_limit = await estimate(gas_manager)
+
+    assert call_gas_limit == (49_000 + 2300) * 64 // 63
+    assert call_gas_limits == [MAX_CALL_GAS_LIMIT, call_gas_limit]
+
+
+@pytest.mark.asyncio
+async def test_call_gas_search_raises_when_the_max_gas_limit_reverts():
+    gas_manager, call_gas_limits = fake_gas_manager(MAX_CALL_GAS_LIMIT + 1, 0)
+
+    with pytest.raises(ExecutionException):
+        await estimate(gas_manager)
+    assert call_gas_limits == [MAX_CALL_GAS_LIMIT]
+
+
+@pytest.mark.asyncio
+async def test_call_gas_search_skips_empty_calldata():
+    gas_manager, call_gas_limits = fake_gas_manager(50_000, 49_000)
+
+    call_gas_limit = await gas_manager.estimate_call_gas_limit_binary_search(
+        "0x" + "22" * 20, SENDER, b"", b"", "latest", "0x1", {}
+    )
+
+    assert call_gas_limit == MIN_CALL_GAS_LIMIT
+    assert call_gas_limits == []
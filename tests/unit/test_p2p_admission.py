@@ -0,0 +1,148 @@
+import pytest
+
+from voltaire_bundler.bundler.exceptions import (
+    ValidationException,
+    ValidationExceptionCode,
+)
+from voltaire_bundler.bundler.execution_endpoint import ExecutionEndpoint
+from voltaire_bundler.bundler.mempool.mempool_manager import (
+    LocalMempoolManagerVersion0Point6,
+)
+from voltaire_bundler.bundler.reputation_manager import ReputationStatus
+from voltaire_bundler.user_operation.user_operation import UserOperation
+
+ENTRYPOINT = "0x5FF137D4b0FDCD49DcA30c7CF57E578a026d2789"
+PEER_ID = "peer"
+
+
+def user_operation_json(nonce):
+    return {
+        "sender": "0xEed01c4FfA9f88096b77d2f16c2e143a94D71298",
+        "nonce": hex(nonce),
+        "initCode": "0x",
+        "callData": "0x1234",
+        "callGasLimit": "0x5208",
+        "verificationGasLimit": "0x186a0",
+        "preVerificationGas": "0xc350",
+        "maxFeePerGas": "0x3b9aca00",
+        "maxPriorityFeePerGas": "0x3b9aca00",
+        "paymasterAndData": "0x",
+        "signature": "0x",
+    }
+
+
+class FakeReputationManager:
+    def __init__(self):
+        self.banned_entities = []
+
+    def get_status(self, entity):
+        return ReputationStatus.OK
+
+    def ban_entity(self, entity):
+        self.banned_entities.append(entity)
+
+
+def fake_mempool_manager(validation_results, admission_results):
+    # validation_results and admission_results map a nonce to the result
+    # of validating or admitting the user operation with that nonce, an
+    # exception is raised instead of returned
+    mempool_manager = object.__new__(LocalMempoolManagerVersion0Point6)
+    admitted_nonces = []
+
+    async def validate_user_operation_p2p(
+        user_operation, peer_id, verified_at_block_hash
+    ):
+        return validation_results[user_operation.nonce]
+
+    async def admit_user_operation_p2p(
+        user_operation, user_operation_hash, is_sender_staked
+    ):
+        admitted_nonces.append(user_operation.nonce)
+        result = admission_results[user_operation.nonce]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    mempool_manager.validate_user_operation_p2p = validate_user_operation_p2p
+    mempool_manager.admit_user_operation_p2p = admit_user_operation_p2p
+    return mempool_manager, admitted_nonces
+
+
+def fake_execution_endpoint(mempool_manager):
+    execution_endpoint = object.__new__(ExecutionEndpoint)
+    execution_endpoint.entrypoints_lowercase_to_checksummed = {
+        ENTRYPOINT.lower(): ENTRYPOINT
+    }
+    execution_endpoint.entrypoints_to_local_mempools = {ENTRYPOINT: mempool_manager}
+    execution_endpoint.reputation_manager = FakeReputationManager()
+    execution_endpoint.chain_id = 1337
+    return execution_endpoint
+
+
+def gossip(user_operations):
+    return {
+        "peer_id": PEER_ID,
+        "topic": "",
+        "useroperations_with_entrypoint": {
+            "entry_point_contract": ENTRYPOINT.lower(),
+            "verified_at_block_hash": "0x" + "00" * 32,
+            "chain_id": hex(1337),
+            "user_operations": user_operations,
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_validated_user_operations_are_admitted_in_order():
+    mempool_manager, admitted_nonces = fake_mempool_manager(
+        {1: (False, "0x01"), 2: None, 3: (False, "0x03")},
+        {1: "Ok", 3: "No"},
+    )
+    user_operations = [
+        UserOperation(user_operation_json(nonce)) for nonce in (1, 2, 3)
+    ]
+    results = await mempool_manager.add_user_operations_p2p(
+        user_operations, PEER_ID, "0x" + "00" * 32
+    )
+
+    assert results == ["Ok", "No", "No"]
+    assert admitted_nonces == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_failed_admission_bans_the_peer_and_stops_the_admissions():
+    mempool_manager, admitted_nonces = fake_mempool_manager(
+        {1: (False, "0x01"), 2: (False, "0x02"), 3: (False, "0x03")},
+        {
+            1: "Ok",
+            2: ValidationException(
+                ValidationExceptionCode.InvalidFields, "invalid"
+            ),
+            3: "Ok",
+        },
+    )
+    execution_endpoint = fake_execution_endpoint(mempool_manager)
+
+    await execution_endpoint._event_p2p_received_gossib(
+        gossip([user_operation_json(nonce) for nonce in (1, 2, 3)])
+    )
+
+    assert admitted_nonces == [1, 2]
+    assert execution_endpoint.reputation_manager.banned_entities == [PEER_ID]
+
+
+@pytest.mark.asyncio
+async def test_malformed_user_operation_bans_the_peer_and_admits_nothing():
+    mempool_manager, admitted_nonces = fake_mempool_manager(
+        {1: (False, "0x01")}, {1: "Ok"}
+    )
+    execution_endpoint = fake_execution_endpoint(mempool_manager)
+    malformed_user_operation = user_operation_json(2)
+    del malformed_user_operation["signature"]
+
+    await execution_endpoint._event_p2p_received_gossib(
+        gossip([user_operation_json(1), malformed_user_operation])
+    )
+
+    assert admitted_nonces == []
+    assert execution_endpoint.reputation_manager.banned_entities == [PEER_ID]
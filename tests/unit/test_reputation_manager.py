@@ -0,0 +1,33 @@
+import pytest
+
+from voltaire_bundler.bundler.reputation_manager import (
+    ReputationManager,
+    ReputationStatus,
+)
+
+
+@pytest.fixture
+def reputation_manager(monkeypatch):
+    # the backoff cron job is not started
+    monkeypatch.setattr(ReputationManager, "__init__", lambda self: None)
+    reputation_manager = ReputationManager()
+    reputation_manager.entities_reputation = {}
+    return reputation_manager
+
+
+def test_update_seen_status_counts_each_entity(reputation_manager):
+    reputation_manager.update_seen_status("0xaa")
+    reputation_manager.update_seen_status_many(["0xaa", "0xbb"])
+
+    assert reputation_manager.entities_reputation["0xaa"].ops_seen == 2
+    assert reputation_manager.entities_reputation["0xbb"].ops_seen == 1
+    assert (
+        reputation_manager.entities_reputation["0xbb"].status
+        == ReputationStatus.OK
+    )
+
+
+def test_set_reputation_lowercases_the_entity(reputation_manager):
+    reputation_manager.set_reputation("0xAbC", 3, 1, ReputationStatus.THROTTLED)
+
+    assert reputation_manager.entities_reputation["0xabc"].ops_seen == 3
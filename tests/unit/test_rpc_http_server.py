@@ -0,0 +1,54 @@
+from functools import partial
+
+import orjson
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from voltaire_bundler.rpc.rpc_http_server import handle, serialize_response
+
+
+@pytest_asyncio.fixture
+async def rpc_client():
+    app = web.Application()
+    app.router.add_post("/rpc", partial(handle, False))
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_returns_a_parse_error(rpc_client):
+    response = await rpc_client.post("/rpc", data=b'{"jsonrpc": "2.0", "id": 1,')
+
+    assert orjson.loads(await response.read())["error"]["code"] == -32700
+
+
+@pytest.mark.asyncio
+async def test_unknown_method_returns_method_not_found(rpc_client):
+    response = await rpc_client.post(
+        "/rpc",
+        data=orjson.dumps(
+            {"jsonrpc": "2.0", "id": 1, "method": "eth_unknown", "params": []}
+        ),
+    )
+
+    assert orjson.loads(await response.read())["error"]["code"] == -32601
+
+
+@pytest.mark.asyncio
+async def test_notification_returns_an_empty_body(rpc_client):
+    response = await rpc_client.post(
+        "/rpc",
+        data=orjson.dumps({"jsonrpc": "2.0", "method": "eth_unknown", "params": []}),
+    )
+
+    assert await response.read() == b""
+
+
+def test_serialize_response_handles_integers_wider_than_64_bits():
+    response = {"jsonrpc": "2.0", "id": 1, "result": 2**80}
+
+    assert orjson.loads(serialize_response(response)) == response
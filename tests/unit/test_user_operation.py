@@ -0,0 +1,73 @@
+from voltaire_bundler.user_operation.user_operation import UserOperation
+from voltaire_bundler.user_operation.user_operation_handler import (
+    get_user_operation_hash_from_fields,
+)
+
+ENTRYPOINT = "0x5FF137D4b0FDCD49DcA30c7CF57E578a026d2789"
+
+
+def user_operation_json(**fields):
+    user_operation = {
+        "sender": "0xEed01c4FfA9f88096b77d2f16c2e143a94D71298",
+        "nonce": "0x1",
+        "initCode": "0x",
+        "callData": "0x1234",
+        "callGasLimit": "0x5208",
+        "verificationGasLimit": "0x186a0",
+        "preVerificationGas": "0xc350",
+        "maxFeePerGas": "0x3b9aca00",
+        "maxPriorityFeePerGas": "0x3b9aca00",
+        "paymasterAndData": "0x",
+        "signature": "0x",
+    }
+    user_operation.update(fields)
+    return user_operation
+
+
+def test_fields_tuple_is_invalidated_when_a_field_changes():
+    user_operation = UserOperation(user_operation_json())
+    fields_tuple = user_operation.to_tuple()
+    assert user_operation.to_tuple() is fields_tuple
+
+    user_operation.call_gas_limit = 100_000
+
+    assert user_operation.to_tuple() is not fields_tuple
+    assert user_operation.to_tuple()[4] == 100_000
+
+
+def test_fields_tuple_is_kept_when_another_attribute_changes():
+    user_operation = UserOperation(user_operation_json())
+    fields_tuple = user_operation.to_tuple()
+
+    user_operation.user_operation_hash = "0x01"
+
+    assert user_operation.to_tuple() is fields_tuple
+
+
+def test_sender_address_lowercase_follows_the_sender_address():
+    user_operation = UserOperation(user_operation_json())
+    assert user_operation.sender_address_lowercase == (
+        "0xeed01c4ffa9f88096b77d2f16c2e143a94d71298"
+    )
+
+    user_operation.sender_address = "0xAbCdEf0000000000000000000000000000000001"
+
+    assert user_operation.sender_address_lowercase == (
+        "0xabcdef0000000000000000000000000000000001"
+    )
+
+
+def test_user_operation_hash_changes_with_the_fields():
+    user_operation = UserOperation(user_operation_json())
+    user_operation_hash = get_user_operation_hash_from_fields(
+        user_operation.to_tuple(), ENTRYPOINT, 1337
+    )
+
+    user_operation.nonce = 2
+
+    assert user_operation_hash != get_user_operation_hash_from_fields(
+        user_operation.to_tuple(), ENTRYPOINT, 1337
+    )
+    assert user_operation_hash == get_user_operation_hash_from_fields(
+        UserOperation(user_operation_json()).to_tuple(), ENTRYPOINT, 1337
+    )
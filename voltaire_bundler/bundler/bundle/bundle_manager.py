@@ -1,6 +1,5 @@
 import asyncio
 import logging
-import math
 from typing import List
 
 from eth_account import Account
@@ -13,10 +12,13 @@ from voltaire_bundler.user_operation.user_operation_handler import (
     UserOperationHandler,
 )
 from voltaire_bundler.utils.encode import encode_handleops_calldata
+from voltaire_bundler.utils.decode import (
+    FAILED_OP_SELECTOR,
+    decode_FailedOp_event,
+)
 
 from ..mempool.mempool_manager import LocalMempoolManagerVersion0Point6
 from ..reputation_manager import ReputationManager
-from ..validation_manager import ValidationManager
 from ..gas_manager import GasManager
 
 
@@ -92,10 +94,10 @@ class BundlerManager:
             self, 
             user_operations: list[UserOperation],
             entrypoint:str
-            ) -> None:
-        user_operations_list = []
-        for user_operation in user_operations:
-            user_operations_list.append(user_operation.to_list())
+            ) -> list[UserOperation]:
+        user_operations_list = [
+            user_operation.to_tuple() for user_operation in user_operations
+        ]
 
         call_data = encode_handleops_calldata(
             user_operations_list, self.bundler_address
@@ -136,14 +138,24 @@ class BundlerManager:
         nonce = tasks[2]["result"]
 
         block_max_fee_per_gas_dec = int(block_max_fee_per_gas, 16)
-        block_max_fee_per_gas_dec_mod = math.ceil(block_max_fee_per_gas_dec * (self.max_fee_per_gas_percentage_multiplier/100) * (self.gas_price_percentage_multiplier/100))
+        block_max_fee_per_gas_dec_mod = (
+            block_max_fee_per_gas_dec
+            * self.max_fee_per_gas_percentage_multiplier
+            * self.gas_price_percentage_multiplier
+            + 9999
+        ) // 10000
         block_max_fee_per_gas = hex(block_max_fee_per_gas_dec_mod)
 
         block_max_priority_fee_per_gas = 0
         if not self.is_legacy_mode:
             block_max_priority_fee_per_gas = tasks[3]["result"]
             block_max_priority_fee_per_gas_dec = int(block_max_priority_fee_per_gas, 16)
-            block_max_priority_fee_per_gas_dec_mod = math.ceil(block_max_priority_fee_per_gas_dec * (self.max_priority_fee_per_gas_percentage_multiplier/100) * (self.gas_price_percentage_multiplier/100))
+            block_max_priority_fee_per_gas_dec_mod = (
+                block_max_priority_fee_per_gas_dec
+                * self.max_priority_fee_per_gas_percentage_multiplier
+                * self.gas_price_percentage_multiplier
+                + 9999
+            ) // 10000
             block_max_priority_fee_per_gas = hex(block_max_priority_fee_per_gas_dec_mod)
 
         txnDict = {
@@ -151,7 +163,7 @@ class BundlerManager:
             "from": self.bundler_address,
             "to": entrypoint,
             "nonce": nonce,
-            "gas": int(gas_estimation, 16),
+            "gas": gas_estimation,
             "data": call_data,
         }
 
@@ -182,22 +194,25 @@ class BundlerManager:
             [sign_store_txn.rawTransaction.hex()],
         )
         if "error" in result:
-            if "data" in result[
-                "error"
-            ] and ValidationManager.check_if_failed_op_error(
-                solidity_error_selector
-            ):
-                # raise ValueError("simulateValidation didn't revert!")
-                error_data = result["error"]["data"]
-                solidity_error_selector = str(error_data[:10])
-
-                solidity_error_params = error_data[10:]
+            error = result["error"]
+            error_data_hex = error.get("data")
+            error_data = b""
+            if isinstance(error_data_hex, str) and len(error_data_hex) >= 10:
+                error_data = bytes.fromhex(error_data_hex[2:])
+
+            if error_data.startswith(FAILED_OP_SELECTOR):
                 (
                     operation_index,
                     reason,
-                ) = ValidationManager.decode_FailedOp_event(
-                    solidity_error_params
+                ) = decode_FailedOp_event(
+                    error_data[4:]
                 )
+                if operation_index >= len(user_operations):
+                    logging.info(
+                        "Failed to send bundle. Dropping all user operations" + str(error)
+                    )
+                    return []
+                user_operation = user_operations[operation_index]
 
                 if (
                     "AA3" in reason
@@ -208,7 +223,7 @@ class BundlerManager:
                     )
                 elif "AA2" in reason:
                     self.reputation_manager.ban_entity(
-                        user_operation.sender_address
+                        user_operation.sender_address_lowercase
                     )
                 elif (
                     "AA1" in reason
@@ -224,21 +239,23 @@ class BundlerManager:
                 del user_operations[operation_index]
 
                 if len(user_operations) > 0:
-                    self.send_bundle(user_operations)
-            elif "message" in result["error"]:
+                    return await self.send_bundle(user_operations, entrypoint)
+                return []
+            elif "message" in error:
+                error_message = error["message"]
                 logging.info(
-                    "Failed to send bundle." + str(result["error"])
+                    "Failed to send bundle." + str(error)
                 )
                 # ErrAlreadyKnown is returned if the transactions is already contained
                 # within the pool.
-                if "already known" in result["error"]["message"]:
+                if "already known" in error_message:
                     return []
                 #ErrInvalidSender is returned if the transaction contains an invalid signature.
-                elif "invalid sender" in result["error"]["message"]:
+                elif "invalid sender" in error_message:
                     pass #todo
                 # ErrUnderpriced is returned if a transaction's gas price is below the minimum
                 # configured for the transaction pool.
-                elif "transaction underpriced" in result["error"]["message"]:
+                elif "transaction underpriced" in error_message:
                     #retry sending useroperations with higher gas price
                     #if the gas_price_percentage_multiplier reached 200, drop the user_operations
                     if self.gas_price_percentage_multiplier <= 200:
@@ -246,48 +263,48 @@ class BundlerManager:
                         return user_operations
                     else:
                         logging.info(
-                            "Failed to send bundle. Dropping all user operations" + str(result["error"])
+                            "Failed to send bundle. Dropping all user operations" + str(error)
                         )
                         return []
                 # ErrReplaceUnderpriced is returned if a transaction is attempted to be replaced
                 # with a different one without the required price bump.
-                elif "replacement transaction underpriced" in result["error"]["message"]:
+                elif "replacement transaction underpriced" in error_message:
                     if self.gas_price_percentage_multiplier <= 200:
                         self.gas_price_percentage_multiplier += 10
                         return user_operations
                     else:
                         logging.info(
-                            "Failed to send bundle. Dropping all user operations" + str(result["error"])
+                            "Failed to send bundle. Dropping all user operations" + str(error)
                         )
                         return []
                 # ErrAccountLimitExceeded is returned if a transaction would exceed the number
                 # allowed by a pool for a single account.
-                elif "account limit exceeded" in result["error"]["message"]:
+                elif "account limit exceeded" in error_message:
                     pass #todo
                 # ErrGasLimit is returned if a transaction's requested gas limit exceeds the
                 # maximum allowance of the current block.
-                elif "exceeds block gas limit" in result["error"]["message"]:
+                elif "exceeds block gas limit" in error_message:
                     pass #todo
                 # ErrNegativeValue is a sanity error to ensure no one is able to specify a
                 # transaction with a negative value.
-                elif "negative value" in result["error"]["message"]:
+                elif "negative value" in error_message:
                     pass #todo
                 # ErrOversizedData is returned if the input data of a transaction is greater
                 # than some meaningful limit a user might use. This is not a consensus error
                 # making the transaction invalid, rather a DOS protection.
-                elif "oversized data" in result["error"]["message"]:
+                elif "oversized data" in error_message:
                     pass #todo
                 # ErrFutureReplacePending is returned if a future transaction replaces a pending
                 # one. Future transactions should only be able to replace other future transactions.
-                elif "future transaction tries to replace pending" in result["error"]["message"]:
+                elif "future transaction tries to replace pending" in error_message:
                     pass #todo
                 else:
                     logging.info(
-                    "Failed to send bundle. Dropping all user operations" + str(result["error"])
+                    "Failed to send bundle. Dropping all user operations" + str(error)
                 )
             else:
                 logging.info(
-                    "Failed to send bundle. Dropping all user operations" + str(result["error"])
+                    "Failed to send bundle. Dropping all user operations" + str(error)
                 )
                 return []
 
@@ -301,7 +318,7 @@ class BundlerManager:
             # todo : check if bundle was included on chain
             for user_operation in user_operations:
                 self.update_included_status(
-                    user_operation.sender_address,
+                    user_operation.sender_address_lowercase,
                     user_operation.factory_address_lowercase,
                     user_operation.paymaster_address_lowercase,
                 )
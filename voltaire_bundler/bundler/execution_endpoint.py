@@ -475,18 +475,23 @@ class ExecutionEndpoint(Endpoint):
             logging.debug(
                 f"Dropping gossib from unsupported chain id : {chain_id}"
             )
-        is_ok = True
-        for user_operation in useroperations_with_entrypoint["user_operations"]:
-            try:
-                user_operation_obj = UserOperation(user_operation)
-           
-                ret = await self.entrypoints_to_local_mempools[entry_point_contract].add_user_operation_p2p(
-                            user_operation_obj, peer_id, verified_at_block_hash
-                )
-
-            except ValidationException as excp:
-                self.reputation_manager.ban_entity(peer_id)
-                break
+        try:
+            user_operations = [
+                UserOperation(user_operation)
+                for user_operation in useroperations_with_entrypoint["user_operations"]
+            ]
+        except ValidationException:
+            # a malformed user operation bans the peer, none of the user
+            # operations of the message are admitted
+            self.reputation_manager.ban_entity(peer_id)
+            return
+
+        try:
+            await self.entrypoints_to_local_mempools[entry_point_contract].add_user_operations_p2p(
+                user_operations, peer_id, verified_at_block_hash
+            )
+        except ValidationException:
+            self.reputation_manager.ban_entity(peer_id)
     
     async def _event_p2p_pooled_user_op_hashes_received(
         self, req_arguments: dict
@@ -1,11 +1,8 @@
-import asyncio
-from functools import reduce
+from functools import lru_cache
 import math
-from typing import Any
-from eth_abi import encode, decode
-
-from eth_utils import keccak
+from typing import Any, NoReturn
 
+from voltaire_bundler.utils.keccak import keccak
 from voltaire_bundler.user_operation.user_operation import UserOperation
 from voltaire_bundler.user_operation.user_operation_handler import (
     UserOperationHandler,
@@ -18,25 +15,87 @@ from voltaire_bundler.bundler.exceptions import (
     ValidationException,
     ValidationExceptionCode,
 )
+from voltaire_bundler.utils.async_utils import gather_or_cancel
 from voltaire_bundler.utils.eth_client_utils import (
+    EXECUTION_REVERTED_MESSAGE,
     send_rpc_request_to_eth_client,
+    send_rpc_batch_request_to_eth_client,
     get_latest_block_info
 )
 from voltaire_bundler.utils.decode import (
+    FAILED_OP_SELECTOR,
     decode_ExecutionResult,
     decode_FailedOp_event,
+    decode_call_data_gas_used_result,
+    decode_uint256_result,
+    decode_error_string_params,
     decode_gasEstimateL1Component_result,
 )
 
 from voltaire_bundler.utils.encode import (
     encode_handleops_calldata,
     encode_gasEstimateL1Component_calldata,
+    encode_get_call_data_gas_used_params,
+    encode_get_l1_fee_params,
+    encode_simulate_handle_op_params,
 )
 
 ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 MAX_VERIFICATION_GAS_LIMIT = 10_000_000
 MIN_CALL_GAS_LIMIT = 21_000
 MAX_CALL_GAS_LIMIT = 30_000_000
+CALL_GAS_ESTIMATION_MIN_STEP = 5000
+CALL_GAS_ESTIMATION_ERROR_RATIO_PER_MILLE = 15
+CALL_GAS_ESTIMATION_PARALLELISM = 4
+# a safety bound only, converging from MIN_CALL_GAS_LIMIT to
+# MAX_CALL_GAS_LIMIT takes well under half of it
+CALL_GAS_ESTIMATION_MAX_ROUNDS = 32
+ZERO_BYTE_GAS = 4
+NON_ZERO_BYTE_GAS = 16
+
+GET_CALL_DATA_GAS_USED_SELECTOR = bytes.fromhex("2ab48e82")
+SIMULATE_HANDLE_OP_SELECTOR = bytes.fromhex("d6383f94")
+GET_L1_FEE_SELECTOR = bytes.fromhex("49948e0e")
+
+# 10^15 eth
+MAX_BALANCE_OVERRIDE = {"balance": "0x314dc6448d9338c15b0a00000000"}
+# 112 bit allows for 10^15 eth
+MAX_DEPOSIT_SLOT_VALUE = "0x000000000000000000000000000000000000314dc6448d9338c15b0a00000000"
+
+# GasHelper Bytecode to be deployed at the entrypoint address
+GAS_HELPER_CODE_OVERRIDE = {
+    "code": "0x608060405234801561000f575f80fd5b5060043610610034575f3560e01c80632ab48e8214610038578063570e1a3614610063575b5f80fd5b61004b610046366004610261565b61008e565b60405161005a939291906102e6565b60405180910390f35b610076610071366004610343565b61017d565b6040516001600160a01b03909116815260200161005a565b5f80606086156100ff57604051632b870d1b60e11b8152309063570e1a36906100bd908b908b90600401610382565b6020604051808303815f875af11580156100d9573d5f803e3d5ffd5b505050506040513d601f19601f820116820180604052508101906100fd91906103b0565b505b5f5a9050896001600160a01b031685888860405161011e9291906103d2565b5f604051808303815f8787f1925050503d805f8114610158576040519150601f19603f3d011682016040523d82523d5f602084013e61015d565b606091505b5090945091505a61016e90826103e1565b92505096509650969350505050565b5f8061018c6014828587610406565b6101959161042d565b60601c90505f6101a88460148188610406565b8080601f0160208091040260200160405190810160405280939291908181526020018383808284375f92018290525084519495509360209350849250905082850182875af190505f519350806101fc575f93505b50505092915050565b6001600160a01b0381168114610219575f80fd5b50565b5f8083601f84011261022c575f80fd5b50813567ffffffffffffffff811115610243575f80fd5b60208301915083602082850101111561025a575f80fd5b9250929050565b5f805f805f8060808789031215610276575f80fd5b863561028181610205565b9550602087013567ffffffffffffffff8082111561029d575f80fd5b6102a98a838b0161021c565b909750955060408901359150808211156102c1575f80fd5b506102ce89828a0161021c565b979a9699509497949695606090950135949350505050565b83151581525f60208460208401526060604084015283518060608501525f5b8181101561032157858101830151858201608001528201610305565b505f608082860101526080601f19601f83011685010192505050949350505050565b5f8060208385031215610354575f80fd5b823567ffffffffffffffff81111561036a575f80fd5b6103768582860161021c565b90969095509350505050565b60208152816020820152818360408301375f818301604090810191909152601f909201601f19160101919050565b5f602082840312156103c0575f80fd5b81516103cb81610205565b9392505050565b818382375f9101908152919050565b8181038181111561040057634e487b7160e01b5f52601160045260245ffd5b92915050565b5f8085851115610414575f80fd5b83861115610420575f80fd5b5050820193919092039150565b6bffffffffffffffffffffffff19813581811691601485101561045a5780818660140360031b1b83161692505b50509291505056fea2646970667358221220c1f32188b95def9ba16ddcd88c16ae85d53bdec7f0d7ff767d14629aa9489aca64736f6c63430008160033"
+}
+
+
+def calc_call_data_cost(call_data: bytes) -> int:
+    # bytes.count runs as a single C scan over the buffer
+    zero_byte_count = call_data.count(b"\x00")
+    non_zero_byte_count = len(call_data) - zero_byte_count
+    return zero_byte_count * ZERO_BYTE_GAS + non_zero_byte_count * NON_ZERO_BYTE_GAS
+
+
+def raise_failed_op(solidity_error_params: bytes) -> NoReturn:
+    _, reason = decode_FailedOp_event(solidity_error_params)
+    raise ValidationException(
+        ValidationExceptionCode.SimulateValidation,
+        reason,
+    )
+
+
+def raise_revert_reason(solidity_error_params: bytes) -> NoReturn:
+    reason = decode_error_string_params(solidity_error_params)
+    raise ValidationException(
+        ValidationExceptionCode.SimulateValidation,
+        reason[0],
+    )
+
+
+SIMULATE_HANDLE_OP_REVERT_DECODERS = {
+    bytes.fromhex("8b7ac980"): decode_ExecutionResult,  # ExecutionResult
+    FAILED_OP_SELECTOR: raise_failed_op,  # FailedOp
+    bytes.fromhex("08c379a0"): raise_revert_reason,  # Error(string)
+}
 
 class GasManager:
     ethereum_node_url: str
@@ -71,37 +130,60 @@ class GasManager:
         latest_block_number, latest_block_basefee, latest_block_gas_limit_hex = await get_latest_block_info(self.ethereum_node_url)
         latest_block_basefee_hex = hex(latest_block_basefee)
 
-        # calculate preverification_gas
+        # the call gas estimation does not depend on the preverification gas,
+        # so its eth_calls are in flight while the preverification gas and
+        # then the verification gas are estimated
+        call_gas_limit, (
+            preverification_gas,
+            verification_gas_limit,
+        ) = await gather_or_cancel(
+            self.estimate_call_gas_limit(
+                entrypoint,
+                user_operation.sender_address,
+                user_operation.init_code,
+                user_operation.call_data,
+                latest_block_number,
+                latest_block_basefee_hex,
+                state_override_set_dict,
+            ),
+            self.estimate_preverificationgas_and_verificationgas(
+                user_operation,
+                entrypoint,
+                latest_block_number,
+                latest_block_basefee,
+                state_override_set_dict,
+            ),
+        )
+        return (
+            hex(call_gas_limit),
+            hex(preverification_gas),
+            hex(verification_gas_limit),
+        )
+
+    async def estimate_preverificationgas_and_verificationgas(
+        self,
+        user_operation: UserOperation,
+        entrypoint:str,
+        block_number_hex: str,
+        latest_block_basefee: int,
+        state_override_set_dict:dict[str, Any]
+    ) -> tuple[int, int]:
         preverification_gas = await self.get_preverification_gas(
-            user_operation, entrypoint, latest_block_number, latest_block_basefee
+            user_operation, entrypoint, block_number_hex, latest_block_basefee
         )
-        preverification_gas_hex = hex(preverification_gas)
         user_operation.pre_verification_gas = preverification_gas
 
         # set verification_gas_limit to MAX_VERIFICATION_GAS_LIMIT to prevent out of gas revert
         user_operation.verification_gas_limit = MAX_VERIFICATION_GAS_LIMIT
 
-        call_gas_limit_hex= await self.estimate_call_gas_limit(
-            entrypoint,
-            user_operation.sender_address,
-            user_operation.init_code,
-            user_operation.call_data,
-            latest_block_number,
-            latest_block_basefee_hex,
-            state_override_set_dict,
-        )
-        verification_gas_hex = await self.estimate_verification_gas_limit(
+        verification_gas_limit = await self.estimate_verification_gas_limit(
             user_operation,
             entrypoint,
-            latest_block_number,
-            latest_block_basefee_hex,
+            block_number_hex,
+            hex(latest_block_basefee),
             state_override_set_dict,
         )
-        return (
-            call_gas_limit_hex,
-            preverification_gas_hex,
-            verification_gas_hex,
-        )
+        return preverification_gas, verification_gas_limit
     
     async def estimate_verification_gas_limit(
         self,
@@ -110,7 +192,7 @@ class GasManager:
         block_number_hex: str,
         latest_block_basefee_hex: str,
         state_override_set_dict:dict[str, Any]
-    ) -> str:
+    ) -> int:
         user_operation.call_gas_limit = MAX_CALL_GAS_LIMIT
         (
             preOpGas,
@@ -127,9 +209,7 @@ class GasManager:
         
         verification_gas_limit = preOpGas - user_operation.pre_verification_gas
 
-        verification_gas_hex = hex(verification_gas_limit)
-
-        return verification_gas_hex
+        return verification_gas_limit
 
     async def estimate_call_gas_limit(
         self,
@@ -140,8 +220,11 @@ class GasManager:
         block_number_hex: str,
         latest_block_basefee_hex: str,
         state_override_set_dict:dict[str, Any],
-    ) -> str:
-        call_gas_limit_hex = "0x"
+    ) -> int:
+        # the entrypoint doesn't call the sender when there is no calldata
+        if len(call_data) == 0:
+            return MIN_CALL_GAS_LIMIT
+
         is_state_override_empty_or_none = not bool(state_override_set_dict) or state_override_set_dict is None
 
         if(
@@ -149,7 +232,7 @@ class GasManager:
             (self.estimate_gas_with_override_enabled or is_state_override_empty_or_none)
         ):
             try:
-                call_gas_limit_hex = await self.estimate_call_gas_limit_using_eth_estimate_modified(
+                call_gas_limit = await self.estimate_call_gas_limit_using_eth_estimate_modified(
                     call_data,
                     entrypoint,
                     sender_address,
@@ -158,7 +241,7 @@ class GasManager:
                 )
             except MethodNotFoundException:
                 self.estimate_gas_with_override_enabled = False
-                call_gas_limit_hex = await self.estimate_call_gas_limit_binary_search(
+                call_gas_limit = await self.estimate_call_gas_limit_binary_search(
                     entrypoint,
                     sender_address,
                     init_code,
@@ -168,7 +251,7 @@ class GasManager:
                     state_override_set_dict,
                 )
         else:
-            call_gas_limit_hex = await self.estimate_call_gas_limit_binary_search(
+            call_gas_limit = await self.estimate_call_gas_limit_binary_search(
                 entrypoint,
                 sender_address,
                 init_code,
@@ -177,45 +260,7 @@ class GasManager:
                 latest_block_basefee_hex,
                 state_override_set_dict,
             )
-        return call_gas_limit_hex
-
-    async def find_max_min_gas(
-            self,
-            entrypoint:str,
-            sender_address:str,
-            init_code:str,
-            call_data:str,
-            block_number_hex: str,
-            latest_block_basefee_hex: str,
-            state_override_set_dict:dict[str, Any],
-            gas_used:int
-    ):
-        success = False
-        index = 1
-        min_gas = gas_used
-        max_gas = 2 * gas_used
-        while(max_gas < MAX_CALL_GAS_LIMIT):
-            success, gas_used, data = await self.get_call_data_gas_used(
-                entrypoint,
-                sender_address,
-                init_code,
-                call_data,
-                max_gas,
-                block_number_hex,
-                latest_block_basefee_hex,
-                state_override_set_dict
-            )
-            if success:
-                break
-            else:
-                index = index + 1
-                min_gas = max_gas
-                max_gas = math.ceil(2**index * gas_used)
-
-                if max_gas > MAX_CALL_GAS_LIMIT:
-                    max_gas = MAX_CALL_GAS_LIMIT
-
-        return max_gas, min_gas
+        return call_gas_limit
 
     async def estimate_call_gas_limit_using_eth_estimate_modified(
         self,
@@ -224,7 +269,7 @@ class GasManager:
         sender_address:str,
         block_number_hex: str,
         state_override_set_dict:dict[str, Any],
-    ) -> str:
+    ) -> int:
 
         call_gas_limit = await self.estimate_call_gas_limit_using_eth_estimate(
             call_data,
@@ -234,14 +279,9 @@ class GasManager:
             state_override_set_dict,
         )
         #remove call extra calldata cost
-        packed_length = len(call_data)
-        zero_byte_count = call_data.count(b"\x00")
-        non_zero_byte_count = packed_length - zero_byte_count
-        call_data_cost = zero_byte_count * 4 + non_zero_byte_count * 16
+        call_data_cost = calc_call_data_cost(call_data)
 
-        call_gas_limit = int(call_gas_limit, 16)- (21000 + call_data_cost)
-        call_gas_limit_hex = hex(call_gas_limit)
-        return call_gas_limit_hex
+        return call_gas_limit - (21000 + call_data_cost)
 
     async def estimate_call_gas_limit_binary_search(
         self,
@@ -252,12 +292,19 @@ class GasManager:
         block_number_hex: str,
         latest_block_basefee_hex: str,
         state_override_set_dict:dict[str, Any],
-    ) -> str:
+    ) -> int:
+        # the entrypoint doesn't call the sender when there is no calldata
+        if len(call_data) == 0:
+            return MIN_CALL_GAS_LIMIT
+
+        # only the gas limit changes between the probes, so the rest of
+        # the getCallDataGasUsed params are encoded once
+        encoded_params = encode_get_call_data_gas_used_params(
+            (sender_address, init_code, call_data, 0)
+        )
         success, gas_used, data = await self.get_call_data_gas_used(
             entrypoint,
-            sender_address,
-            init_code,
-            call_data,
+            encoded_params,
             MAX_CALL_GAS_LIMIT,
             block_number_hex,
             latest_block_basefee_hex,
@@ -270,62 +317,98 @@ class GasManager:
                 data,
             )
         
-        right, left = await self.find_max_min_gas(
-            entrypoint,
-            sender_address,
-            init_code,
-            call_data,
-            block_number_hex,
-            latest_block_basefee_hex,
-            state_override_set_dict,
-            gas_used
-        )
-
-        while(left + 5000 < right):
-            mid = left + math.ceil((right-left) / 2)
-            success, gas_used, data = await self.get_call_data_gas_used(
+        # same approach as geth's eth_estimateGas: anything below the gas
+        # used can't succeed, and the gas used plus the 1/64 retained by
+        # the 63/64 rule (and the call stipend) almost always does
+        left = gas_used - 1
+        right = MAX_CALL_GAS_LIMIT
+        optimistic_gas_limit = (gas_used + 2300) * 64 // 63
+        if optimistic_gas_limit < right:
+            success, _, _ = await self.get_call_data_gas_used(
                 entrypoint,
-                sender_address,
-                init_code,
-                call_data,
-                mid,
+                encoded_params,
+                optimistic_gas_limit,
                 block_number_hex,
                 latest_block_basefee_hex,
                 state_override_set_dict
             )
             if success:
-                right = mid
+                right = optimistic_gas_limit
             else:
-                left = mid + 1
+                left = optimistic_gas_limit
+
+        # the search ends once the window is within CALL_GAS_ESTIMATION_MIN_STEP
+        # or the error ratio, right is always a gas limit that succeeded
+        rounds_left = CALL_GAS_ESTIMATION_MAX_ROUNDS
+        while (
+            rounds_left > 0 and
+            right - left > CALL_GAS_ESTIMATION_MIN_STEP and
+            (right - left) * 1000 > right * CALL_GAS_ESTIMATION_ERROR_RATIO_PER_MILLE
+        ):
+            # like geth's min(2 * left, (left + right) // 2) midpoint, the
+            # probes are spread evenly up to twice the lower bound to bias
+            # the search toward it, the needed gas is usually much closer
+            # to the gas used than to the upper bound
+            rounds_left -= 1
+            upper = min(right, 2 * max(left, MIN_CALL_GAS_LIMIT))
+            # right already succeeded, so it is never probed again
+            number_of_parts = CALL_GAS_ESTIMATION_PARALLELISM + (upper == right)
+            step = max((upper - left) // number_of_parts, 1)
+            probes = [
+                gas
+                for gas in range(left + step, upper + 1, step)
+                if gas < right
+            ][:CALL_GAS_ESTIMATION_PARALLELISM]
+            # a k-ary search round: all the probes are sent at once
+            results = await gather_or_cancel(
+                *(
+                    self.get_call_data_gas_used(
+                        entrypoint,
+                        encoded_params,
+                        gas,
+                        block_number_hex,
+                        latest_block_basefee_hex,
+                        state_override_set_dict
+                    )
+                    for gas in probes
+                )
+            )
+            for gas, (success, _, _) in zip(probes, results):
+                if success:
+                    right = gas
+                    break
+                left = gas
 
         call_gas_limit = right
-        return hex(call_gas_limit)
+        return call_gas_limit
 
     async def get_call_data_gas_used(
         self,
         entrypoint:str,
-        sender:str,
-        init_code:str,
-        call_data:str,
+        encoded_params:bytes,
         call_gas_limit:int,
         block_number_hex: str,
         latest_block_basefee: str,
         state_override_set_dict:dict[str, Any]
     ) -> int:
 
-        function_selector = "0x2ab48e82"
-        params = encode(
-            ["address", "bytes", "bytes", "uint256"], 
-            [sender, init_code, call_data, call_gas_limit]
-        )
-        call_data = function_selector + params.hex()
+        # encoded_params is (address sender, bytes initCode, bytes callData,
+        # uint256 callGasLimit), the gas limit is the static 4th head word
+        call_data = "0x" + b"".join(
+            (
+                GET_CALL_DATA_GAS_USED_SELECTOR,
+                encoded_params[:96],
+                call_gas_limit.to_bytes(32, "big"),
+                encoded_params[128:],
+            )
+        ).hex()
 
         default_state_overrides = {
             # GasHelper Bytecode to be deployed at the entrypoint address
-            entrypoint: {
-                "code": "0x608060405234801561000f575f80fd5b5060043610610034575f3560e01c80632ab48e8214610038578063570e1a3614610063575b5f80fd5b61004b610046366004610261565b61008e565b60405161005a939291906102e6565b60405180910390f35b610076610071366004610343565b61017d565b6040516001600160a01b03909116815260200161005a565b5f80606086156100ff57604051632b870d1b60e11b8152309063570e1a36906100bd908b908b90600401610382565b6020604051808303815f875af11580156100d9573d5f803e3d5ffd5b505050506040513d601f19601f820116820180604052508101906100fd91906103b0565b505b5f5a9050896001600160a01b031685888860405161011e9291906103d2565b5f604051808303815f8787f1925050503d805f8114610158576040519150601f19603f3d011682016040523d82523d5f602084013e61015d565b606091505b5090945091505a61016e90826103e1565b92505096509650969350505050565b5f8061018c6014828587610406565b6101959161042d565b60601c90505f6101a88460148188610406565b8080601f0160208091040260200160405190810160405280939291908181526020018383808284375f92018290525084519495509360209350849250905082850182875af190505f519350806101fc575f93505b50505092915050565b6001600160a01b0381168114610219575f80fd5b50565b5f8083601f84011261022c575f80fd5b50813567ffffffffffffffff811115610243575f80fd5b60208301915083602082850101111561025a575f80fd5b9250929050565b5f805f805f8060808789031215610276575f80fd5b863561028181610205565b9550602087013567ffffffffffffffff8082111561029d575f80fd5b6102a98a838b0161021c565b909750955060408901359150808211156102c1575f80fd5b506102ce89828a0161021c565b979a9699509497949695606090950135949350505050565b83151581525f60208460208401526060604084015283518060608501525f5b8181101561032157858101830151858201608001528201610305565b505f608082860101526080601f19601f83011685010192505050949350505050565b5f8060208385031215610354575f80fd5b823567ffffffffffffffff81111561036a575f80fd5b6103768582860161021c565b90969095509350505050565b60208152816020820152818360408301375f818301604090810191909152601f909201601f19160101919050565b5f602082840312156103c0575f80fd5b81516103cb81610205565b9392505050565b818382375f9101908152919050565b8181038181111561040057634e487b7160e01b5f52601160045260245ffd5b92915050565b5f8085851115610414575f80fd5b83861115610420575f80fd5b5050820193919092039150565b6bffffffffffffffffffffffff19813581811691601485101561045a5780818660140360031b1b83161692505b50509291505056fea2646970667358221220c1f32188b95def9ba16ddcd88c16ae85d53bdec7f0d7ff767d14629aa9489aca64736f6c63430008160033"
-            }
+            entrypoint: GAS_HELPER_CODE_OVERRIDE
         }
+        if state_override_set_dict:
+            default_state_overrides.update(state_override_set_dict)
 
         params = [
             {
@@ -335,7 +418,7 @@ class GasManager:
                 "gasPrice": latest_block_basefee,
             },
             block_number_hex,
-            default_state_overrides | state_override_set_dict,
+            default_state_overrides,
         ]
         result = await send_rpc_request_to_eth_client(
             self.ethereum_node_url, "eth_call", params
@@ -350,7 +433,7 @@ class GasManager:
                 ExecutionExceptionCode.EXECUTION_REVERTED,
                 errorMessage + " " + bytes.fromhex(errorParams[-64:]).decode("ascii"),
             )
-        success, gas_used, data = decode(["bool", "uint256", "bytes"], bytes.fromhex(result["result"][2:]))
+        success, gas_used, data = decode_call_data_gas_used_result(result["result"])
 
         return success, gas_used, data
 
@@ -362,8 +445,8 @@ class GasManager:
         block_number_hex = "latest",
         state_override_set_dict = {},
     ):
-        if call_data == "0x":
-            return "0x"
+        if len(call_data) == 0:
+            return 0
         
         params = [
             {
@@ -398,7 +481,7 @@ class GasManager:
                 errorMessage + " " + bytes.fromhex(errorParams[-64:]).decode("ascii"),
             )
         
-        call_gas_limit = result["result"]
+        call_gas_limit = int(result["result"], 16)
         
         return call_gas_limit
 
@@ -413,32 +496,22 @@ class GasManager:
         target_call_data: bytes = bytes(0),
     ):
         # simulateHandleOp(entrypoint solidity function) will always revert
-        function_selector = "0xd6383f94"
-        params = encode(
-            [
-                "(address,uint256,bytes,bytes,uint256,uint256,uint256,uint256,uint256,bytes,bytes)",  # useroperation
-                "address",  # target (Optional - to check the )
-                "bytes",  # targetCallData
-            ],
-            [user_operation.to_list(), target, target_call_data],
+        params = encode_simulate_handle_op_params(
+            (user_operation.to_tuple(), target, target_call_data)
         )
 
-        call_data = function_selector + params.hex()
+        call_data = "0x" + (SIMULATE_HANDLE_OP_SELECTOR + params).hex()
 
         default_state_overrides = {
             # override the zero address balance with a high value as it is the "from"
-            ZERO_ADDRESS: {
-                "balance": "0x314dc6448d9338c15b0a00000000"
-            },
+            ZERO_ADDRESS: MAX_BALANCE_OVERRIDE,
         }
         #if there is no paymaster, override the sender's balance for gas estimation
         if(len(user_operation.paymaster_and_data) == 0):
             if(target == ZERO_ADDRESS):
                 # if the target is zero, simulate_handle_op is called to estimate gas limits
                 # override the sender balance with the high value of 10^15 eth
-                default_state_overrides[user_operation.sender_address] = {
-                    "balance": "0x314dc6448d9338c15b0a00000000"
-                }
+                default_state_overrides[user_operation.sender_address] = MAX_BALANCE_OVERRIDE
             else:
                 # if the target is not zero, simulate_handle_op is called to detect calldata reverts
                 # override the sender deposit slot on the entrypoint contract with the highest deposit value 10^15 eth
@@ -446,17 +519,21 @@ class GasManager:
                 sender_deposit_slot_index = self.calculate_deposit_slot_index(user_operation.sender_address)
                 default_state_overrides[(entrypoint)] = {
                     "stateDiff": {
-                        (sender_deposit_slot_index): "0x000000000000000000000000000000000000314dc6448d9338c15b0a00000000" #112 bit allows for 10^15 eth
+                        (sender_deposit_slot_index): MAX_DEPOSIT_SLOT_VALUE
                     },
                 }
         else:
             paymaster_deposit_slot_index = self.calculate_deposit_slot_index("0x" + user_operation.paymaster_and_data[:20].hex())
             default_state_overrides[(entrypoint)] = {
                 "stateDiff": {
-                    (paymaster_deposit_slot_index): "0x000000000000000000000000000000000000314dc6448d9338c15b0a00000000" #112 bit allows for 10^15 eth
+                    (paymaster_deposit_slot_index): MAX_DEPOSIT_SLOT_VALUE
                 },
             }
 
+        # the user supplied overrides take precedence over the defaults
+        if state_override_set_dict:
+            default_state_overrides.update(state_override_set_dict)
+
         params = [
             {
                 "from": ZERO_ADDRESS,
@@ -465,61 +542,46 @@ class GasManager:
                 "gasPrice": latest_block_basefee,
             },
             block_number_hex,
-            # default_state_overrides | state_override_set_dict,
+            default_state_overrides,
         ]
-        if(bool(default_state_overrides | state_override_set_dict)):
-            params.append(default_state_overrides | state_override_set_dict)
 
         result = await send_rpc_request_to_eth_client(
             self.ethereum_node_url, "eth_call", params
         )
 
-        if ("error" not in result):
+        error = result.get("error")
+        if error is None:
             raise ValueError("simulateHandleOp didn't revert!")
 
-        elif (
-            "execution reverted" not in result["error"]["message"] or
-            "data" not in result["error"] or len(result["error"]["data"]) < 10
+        error_data = error.get("data")
+        if (
+            EXECUTION_REVERTED_MESSAGE not in error["message"] or
+            error_data is None or len(error_data) < 10
         ):
             raise ValidationException(
                 ValidationExceptionCode.SimulateValidation,
-                result["error"]["message"],
+                error["message"],
             )
 
-        error_data = result["error"]["data"]
-        solidity_error_selector = str(error_data[:10])
-        solidity_error_params = error_data[10:]
+        error_data = bytes.fromhex(error_data[2:])
+        solidity_error_selector = error_data[:4]
+        solidity_error_params = error_data[4:]
 
-        if solidity_error_selector == "0x8b7ac980":
-            (
-                preOpGas,
-                paid,
-                targetSuccess,
-                targetResult,
-            ) = decode_ExecutionResult(solidity_error_params)
-        elif solidity_error_selector == "0x220266b6":
-            (
-                _,
-                reason,
-            ) = decode_FailedOp_event(solidity_error_params)
+        decode_revert = SIMULATE_HANDLE_OP_REVERT_DECODERS.get(
+            solidity_error_selector
+        )
+        if decode_revert is None:
             raise ValidationException(
                 ValidationExceptionCode.SimulateValidation,
-                reason,
+                solidity_error_params.hex(),
             )
-        elif solidity_error_selector == "0x08c379a0":  # Error(string)
-            reason = decode(
-                ["string"], bytes.fromhex(solidity_error_params)
-            )  # decode revert message
 
-            raise ValidationException(
-                ValidationExceptionCode.SimulateValidation,
-                reason[0],
-            )
-        else:
-            raise ValidationException(
-                ValidationExceptionCode.SimulateValidation,
-                solidity_error_params,
-            )
+        (
+            preOpGas,
+            paid,
+            targetSuccess,
+            targetResult,
+        ) = decode_revert(solidity_error_params)
 
         return preOpGas, paid, targetSuccess, targetResult
 
@@ -529,24 +591,23 @@ class GasManager:
         max_fee_per_gas = user_operation.max_fee_per_gas
         max_priority_fee_per_gas = user_operation.max_priority_fee_per_gas
 
-        block_max_fee_per_gas_op = send_rpc_request_to_eth_client(
-            self.ethereum_node_url, "eth_gasPrice"
-        )
-
-        tasks_arr = [block_max_fee_per_gas_op]
+        methods_and_params = [("eth_gasPrice", None)]
 
         if not self.is_legacy_mode:
-            block_max_priority_fee_per_gas_op = send_rpc_request_to_eth_client(
-                self.ethereum_node_url, "eth_maxPriorityFeePerGas"
-            )
-            tasks_arr.append(block_max_priority_fee_per_gas_op)
+            methods_and_params.append(("eth_maxPriorityFeePerGas", None))
 
-        tasks = await asyncio.gather(*tasks_arr)
+        tasks = await send_rpc_batch_request_to_eth_client(
+            self.ethereum_node_url, methods_and_params
+        )
 
         block_max_fee_per_gas_hex = tasks[0]["result"]
         block_max_fee_per_gas = int(tasks[0]["result"], 16)
-        block_max_fee_per_gas = math.ceil(block_max_fee_per_gas * (self.max_fee_per_gas_percentage_multiplier/100))
-        block_max_fee_per_gas_with_tolerance = math.ceil(block_max_fee_per_gas * (1 - (enforce_gas_price_tolerance/100)))
+        block_max_fee_per_gas = (
+            block_max_fee_per_gas * self.max_fee_per_gas_percentage_multiplier + 99
+        ) // 100
+        block_max_fee_per_gas_with_tolerance = (
+            block_max_fee_per_gas * (100 - enforce_gas_price_tolerance) + 99
+        ) // 100
         block_max_fee_per_gas_with_tolerance_hex = hex(block_max_fee_per_gas_with_tolerance)
 
         if enforce_gas_price_tolerance < 100:
@@ -560,7 +621,11 @@ class GasManager:
 
             else:
                 block_max_priority_fee_per_gas = int(tasks[1]["result"], 16)
-                block_max_priority_fee_per_gas = math.ceil(block_max_priority_fee_per_gas * (self.max_priority_fee_per_gas_percentage_multiplier/100))
+                block_max_priority_fee_per_gas = (
+                    block_max_priority_fee_per_gas
+                    * self.max_priority_fee_per_gas_percentage_multiplier
+                    + 99
+                ) // 100
 
                 estimated_base_fee = max(
                     block_max_fee_per_gas - block_max_priority_fee_per_gas, 1
@@ -574,7 +639,7 @@ class GasManager:
                 if max_priority_fee_per_gas < 1:
                     raise ValidationException(
                         ValidationExceptionCode.InvalidFields,
-                        f"Max priority fee per gas is too low. it should be minimum : 1",
+                        "Max priority fee per gas is too low. it should be minimum : 1",
                     )
                 if (
                     min(
@@ -619,25 +684,21 @@ class GasManager:
         latest_block_base_fee: int
     ) -> int:
 
-        user_operations_list = [user_operation.to_list()]
-
         # currently most bundles contains a singler useroperations
         # so l1 fees is calculated for the full handleops transaction 
-        handleops_calldata = encode_handleops_calldata(
-            user_operations_list, ZERO_ADDRESS
+        handleops_calldata = encode_single_handleops_calldata(
+            user_operation.to_tuple()
         )
 
         optimism_gas_oracle_contract_address = (
             "0x420000000000000000000000000000000000000F"
         )
 
-        function_selector = "0x49948e0e" # getL1Fee
-        params = encode(
-            ["bytes"], 
-            [bytes.fromhex(handleops_calldata[2:])]
+        params = encode_get_l1_fee_params(
+            (bytes.fromhex(handleops_calldata[2:]),)
         )
 
-        call_data = function_selector + params.hex()
+        call_data = "0x" + (GET_L1_FEE_SELECTOR + params).hex()
 
         params = [
             {
@@ -652,7 +713,7 @@ class GasManager:
             self.ethereum_node_url, "eth_call", params
         )
 
-        l1_fee = decode(["uint256"], bytes.fromhex(result["result"][2:]))[0]
+        l1_fee = decode_uint256_result(result["result"])
 
         l2_gas_price = min(
             user_operation.max_fee_per_gas,
@@ -660,7 +721,7 @@ class GasManager:
         )
         l2_gas_price = max(1, l2_gas_price) #in case l2_gas_price = 0
 
-        gas_estimate_for_l1 = math.ceil(l1_fee / l2_gas_price)
+        gas_estimate_for_l1 = (l1_fee + l2_gas_price - 1) // l2_gas_price
 
         return gas_estimate_for_l1
 
@@ -673,10 +734,8 @@ class GasManager:
 
         is_init: bool = user_operation.nonce == 0
 
-        user_operations_list = [user_operation.to_list()]
-
-        handleops_calldata = encode_handleops_calldata(
-            user_operations_list, ZERO_ADDRESS
+        handleops_calldata = encode_single_handleops_calldata(
+            user_operation.to_tuple()
         )
 
         call_data = encode_gasEstimateL1Component_calldata(
@@ -727,14 +786,11 @@ class GasManager:
 
         calculated_preverification_gas = base_preverification_gas + l1_gas
 
-        adjusted_preverification_gas = math.ceil(
-            (
-                calculated_preverification_gas
-                * preverification_gas_percentage_coefficient
-                / 100
-            )
-            + preverification_gas_addition_constant
-        )
+        adjusted_preverification_gas = (
+            calculated_preverification_gas
+            * preverification_gas_percentage_coefficient
+            + 99
+        ) // 100 + preverification_gas_addition_constant
 
         return adjusted_preverification_gas
 
@@ -750,42 +806,56 @@ class GasManager:
                 10
             ] = b"\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01"  # signature
 
-        fixed = 21000
-        per_user_operation = 18300
-        per_user_operation_word = 4
-        zero_byte = 4
-        non_zero_byte = 16
-        bundle_size = 1
-        # sigSize = 65
-
-        packed = UserOperationHandler.pack_user_operation(
-            user_operation_list, False
+        # the same operation is priced on estimation, on admission and on
+        # every revalidation, so the result is cached by its packed fields
+        return calc_base_preverification_gas_from_fields(
+            tuple(user_operation_list)
         )
-        packed_length = len(packed)
-        zero_byte_count = packed.count(b"\x00")
-        non_zero_byte_count = packed_length - zero_byte_count
-        call_data_cost = zero_byte_count * zero_byte + non_zero_byte_count * non_zero_byte
-
-        length_in_words = math.ceil((packed_length + 31) /32)
-        # cost_list = list(
-        #     map(lambda x: zero_byte if x == b"\x00" else non_zero_byte, packed)
-        # )
-        # call_data_cost = reduce(lambda x, y: x + y, cost_list)
-
-        pre_verification_gas = (
-            call_data_cost
-            + (fixed / bundle_size)
-            + per_user_operation
-            + per_user_operation_word * length_in_words
-        )
-
-        return math.ceil(pre_verification_gas)
 
     @staticmethod
     def calculate_deposit_slot_index(address, slot = 0): #deposits is at slot 0
-        return "0x" + keccak(
-                encode(
-                    ["uint256", "uint256"],
-                    [int(address, 16), slot]
-                )
-            ).hex()
\ No newline at end of file
+        # senders come checksummed and paymasters lowercase, so the cache
+        # is keyed by the lowercase address to share the entries
+        return calculate_deposit_slot_index_lowercase(address.lower(), slot)
+
+
+@lru_cache(maxsize=4096)
+def calculate_deposit_slot_index_lowercase(address_lowercase, slot):
+    # abi.encode(uint256, uint256) is the two 32 bytes big endian words
+    return "0x" + keccak(
+            int(address_lowercase, 16).to_bytes(32, "big")
+            + slot.to_bytes(32, "big")
+        ).hex()
+
+
+@lru_cache(maxsize=1024)
+def calc_base_preverification_gas_from_fields(user_operation_fields: tuple) -> int:
+    fixed = 21000
+    per_user_operation = 18300
+    per_user_operation_word = 4
+    bundle_size = 1
+    # sigSize = 65
+
+    packed = UserOperationHandler.pack_user_operation(
+        list(user_operation_fields), False
+    )
+    packed_length = len(packed)
+    call_data_cost = calc_call_data_cost(packed)
+
+    length_in_words = math.ceil((packed_length + 31) /32)
+
+    pre_verification_gas = (
+        call_data_cost
+        + (fixed // bundle_size)
+        + per_user_operation
+        + per_user_operation_word * length_in_words
+    )
+
+    return pre_verification_gas
+
+
+@lru_cache(maxsize=1024)
+def encode_single_handleops_calldata(user_operation_fields: tuple) -> str:
+    # the L1 fee of an operation is priced on estimation and again on
+    # admission, keyed by the operation fields the calldata is the same
+    return encode_handleops_calldata([user_operation_fields], ZERO_ADDRESS)
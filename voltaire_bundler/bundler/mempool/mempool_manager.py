@@ -1,3 +1,4 @@
+from collections import defaultdict
 from dataclasses import dataclass
 import asyncio
 from functools import cache
@@ -20,10 +21,12 @@ from voltaire_bundler.bundler.exceptions import (
 from voltaire_bundler.utils.eth_client_utils import (
     get_latest_block_info
 )
+from voltaire_bundler.utils.async_utils import gather_or_cancel
 from voltaire_bundler.typing import Address, MempoolId
 from voltaire_bundler.cli_manager import MempoolType
 
 MAX_OPS_PER_REQUEST = 4096
+MAX_INFLIGHT_P2P_VALIDATIONS = 32
 
 class LocalMempoolManager:
     supported_mempools_types_to_mempools_ids: dict[MempoolType, MempoolId]
@@ -72,7 +75,7 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         self.is_unsafe = is_unsafe
         self.enforce_gas_price_tolerance = enforce_gas_price_tolerance
         self.senders_to_senders_mempools = {}
-        self.entity_to_no_of_ops_in_mempool = {}
+        self.entity_to_no_of_ops_in_mempool = defaultdict(int)
         self.verified_block_to_useroperations_standard_mempool_gossip_queue = dict()
         self.supported_mempools_types_to_mempools_ids = supported_mempools_types_to_mempools_ids
         self.seen_user_operation_hashs = set()
@@ -89,7 +92,7 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         
         latest_block_number, latest_block_basefee, _ = await get_latest_block_info(self.ethereum_node_url)
         self._verify_entities_reputation(
-            user_operation.sender_address,
+            user_operation.sender_address_lowercase,
             user_operation.factory_address_lowercase,
             user_operation.paymaster_address_lowercase,
         )
@@ -114,7 +117,7 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             # "latest"
         )
         new_sender = None
-        new_sender_address = user_operation.sender_address
+        new_sender_address = user_operation.sender_address_lowercase
 
         if new_sender_address not in self.senders_to_senders_mempools:
             self.senders_to_senders_mempools[new_sender_address] = SenderMempool(
@@ -131,7 +134,7 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         )
 
         self.update_all_seen_status(
-            user_operation.sender_address,
+            user_operation.sender_address_lowercase,
             user_operation.factory_address_lowercase,
             user_operation.paymaster_address_lowercase,
         )
@@ -157,12 +160,29 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             user_operation: UserOperation,
             peer_id: str, 
             verified_at_block_hash: str
-            ) -> None:
+            ) -> str:
+        validation_result = await self.validate_user_operation_p2p(
+            user_operation, peer_id, verified_at_block_hash
+        )
+        if validation_result is None:
+            return "No"
+
+        is_sender_staked, user_operation_hash = validation_result
+        return await self.admit_user_operation_p2p(
+            user_operation, user_operation_hash, is_sender_staked
+        )
+
+    async def validate_user_operation_p2p(
+            self, 
+            user_operation: UserOperation,
+            peer_id: str, 
+            verified_at_block_hash: str
+            ) -> tuple[bool, str] | None:
         latest_block_number, latest_block_basefee, _ = await get_latest_block_info(self.ethereum_node_url)
 
         try:
             self._verify_entities_reputation(
-                user_operation.sender_address,
+                user_operation.sender_address_lowercase,
                 user_operation.factory_address_lowercase,
                 user_operation.paymaster_address_lowercase,
             ) 
@@ -172,8 +192,8 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             gas_price_hex = await self.gas_manager.verify_gas_fees_and_get_price(
                 user_operation, self.enforce_gas_price_tolerance
             )
-        except ValidationException as excp:
-                return "No"
+        except ValidationException:
+                return None
 
         try:
             (
@@ -188,11 +208,11 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             )
 
             if self.is_hash_seen(user_operation_hash):
-                return "No"
+                return None
             else:
                 self.seen_user_operation_hashs.add(user_operation_hash)
 
-        except ValidationException as excp:
+        except ValidationException:
             try:
                 (
                     is_sender_staked,
@@ -204,13 +224,32 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
                     # latest_block_basefee,
                     gas_price_hex
                 )
-            except ValidationException as excp:
+            except ValidationException:
                 self.reputation_manager.ban_entity(peer_id)
 
+            return None
+
+        return is_sender_staked, user_operation_hash
+
+    async def admit_user_operation_p2p(
+            self, 
+            user_operation: UserOperation,
+            user_operation_hash: str,
+            is_sender_staked: bool
+            ) -> str:
+        # the reputation is checked again as operations validated at the
+        # same time may have been admitted for the same entities since
+        try:
+            self._verify_entities_reputation(
+                user_operation.sender_address_lowercase,
+                user_operation.factory_address_lowercase,
+                user_operation.paymaster_address_lowercase,
+            )
+        except ValidationException:
             return "No"
 
         new_sender = None
-        new_sender_address = user_operation.sender_address
+        new_sender_address = user_operation.sender_address_lowercase
 
         if new_sender_address not in self.senders_to_senders_mempools:
             self.senders_to_senders_mempools[new_sender_address] = SenderMempool(
@@ -226,7 +265,7 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         )
 
         self.update_all_seen_status(
-            user_operation.sender_address,
+            user_operation.sender_address_lowercase,
             user_operation.factory_address_lowercase,
             user_operation.paymaster_address_lowercase,
         )
@@ -247,33 +286,120 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         user_operation.user_operation_hash = user_operation_hash
 
         return "Ok"
+
+    async def add_user_operations_p2p(
+            self,
+            user_operations: List[UserOperation],
+            peer_id: str,
+            verified_at_block_hash: str,
+            max_inflight: int = MAX_INFLIGHT_P2P_VALIDATIONS,
+            ) -> list[str]:
+        # only the validation runs concurrently, a ValidationException
+        # raised while admitting an operation stops the admission of the
+        # remaining ones so the caller can ban the peer
+        semaphore = asyncio.Semaphore(max_inflight)
+
+        async def validate_one(user_operation: UserOperation):
+            async with semaphore:
+                return await self.validate_user_operation_p2p(
+                    user_operation, peer_id, verified_at_block_hash
+                )
+
+        validation_results = await gather_or_cancel(
+            *(validate_one(user_operation) for user_operation in user_operations)
+        )
+
+        # the admission is sequential so that the reputation and the per
+        # sender limits account for the operations admitted before it
+        results = []
+        for user_operation, validation_result in zip(
+            user_operations, validation_results
+        ):
+            if validation_result is None:
+                results.append("No")
+                continue
+            is_sender_staked, user_operation_hash = validation_result
+            results.append(
+                await self.admit_user_operation_p2p(
+                    user_operation, user_operation_hash, is_sender_staked
+                )
+            )
+        return results
     
     def is_hash_seen(self, user_operation_hash:str) -> bool:
         return user_operation_hash in self.seen_user_operation_hashs
 
     async def get_user_operations_to_bundle(self) -> list[UserOperation]:
-        bundle = []
-        for sender_address in list(self.senders_to_senders_mempools):
-            sender = self.senders_to_senders_mempools[sender_address]
-            if len(sender.user_operation_hashs_to_user_operation) > 0:
-                user_operation = sender.user_operation_hashs_to_user_operation.pop(
-                    next(iter(sender.user_operation_hashs_to_user_operation))
-                )
+        # senders are removed as soon as they run out of user operations,
+        # so every sender in the mempool has at least one to bundle
+        candidates = [
+            (sender, next(iter(sender.user_operation_hashs_to_user_operation)))
+            for sender in self.senders_to_senders_mempools.values()
+        ]
 
-                if not self.is_unsafe:
-                    new_code_hash = (
-                        await self.validation_manager.get_addresses_code_hash(
-                            user_operation.associated_addresses
-                        )
-                    )
-                    if new_code_hash != user_operation.code_hash:
-                        continue
+        if self.is_unsafe:
+            return [
+                user_operation
+                for user_operation in self._remove_user_operations_to_bundle(
+                    candidates
+                )
+                if user_operation is not None
+            ]
+
+        # the code hashes are fetched in batch requests and only once for
+        # user operations with the same associated addresses
+        candidates_associated_addresses = [
+            tuple(
+                sender.user_operation_hashs_to_user_operation[
+                    user_operation_hash
+                ].associated_addresses
+            )
+            for sender, user_operation_hash in candidates
+        ]
+        unique_associated_addresses = list(
+            dict.fromkeys(candidates_associated_addresses)
+        )
+        code_hashes = []
+        if len(unique_associated_addresses) > 0:
+            code_hashes = await self.validation_manager.get_addresses_code_hashes(
+                [
+                    list(associated_addresses)
+                    for associated_addresses in unique_associated_addresses
+                ]
+            )
+        associated_addresses_to_code_hash = dict(
+            zip(unique_associated_addresses, code_hashes)
+        )
 
-                bundle.append(user_operation)
-                if len(sender.user_operation_hashs_to_user_operation) == 0:
-                    del self.senders_to_senders_mempools[sender.address]
+        # the user operations are only removed from the mempool once the
+        # code hashes are fetched, so a failed request doesn't drop them
+        return [
+            user_operation
+            for user_operation, associated_addresses in zip(
+                self._remove_user_operations_to_bundle(candidates),
+                candidates_associated_addresses,
+            )
+            if user_operation is not None
+            and associated_addresses_to_code_hash[associated_addresses]
+            == user_operation.code_hash
+        ]
 
-        return bundle
+    def _remove_user_operations_to_bundle(
+        self, candidates: list[tuple[SenderMempool, str]]
+    ) -> list[UserOperation | None]:
+        # a user operation replaced since it was picked is not bundled
+        user_operations = []
+        for sender, user_operation_hash in candidates:
+            sender_user_operations = sender.user_operation_hashs_to_user_operation
+            user_operations.append(
+                sender_user_operations.pop(user_operation_hash, None)
+            )
+            if (
+                len(sender_user_operations) == 0
+                and self.senders_to_senders_mempools.get(sender.address) is sender
+            ):
+                del self.senders_to_senders_mempools[sender.address]
+        return user_operations
 
     def get_user_operations_hashes_with_mempool_id(
             self, 
@@ -281,12 +407,10 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             offset: int
     ) -> (List[str], int):
         user_operations_hashs = []
-        for sender_address in list(self.senders_to_senders_mempools):
-            sender = self.senders_to_senders_mempools[sender_address]
-            if len(sender.user_operation_hashs_to_user_operation) > 0:
-                for user_operation_hash, user_operation in sender.user_operation_hashs_to_user_operation.items():
-                    if mempool_id in user_operation.valid_mempools_ids:
-                        user_operations_hashs.append(list(bytes.fromhex(user_operation_hash[2:])))
+        for sender in self.senders_to_senders_mempools.values():
+            for user_operation_hash, user_operation in sender.user_operation_hashs_to_user_operation.items():
+                if mempool_id in user_operation.valid_mempools_ids:
+                    user_operations_hashs.append(list(bytes.fromhex(user_operation_hash[2:])))
 
         start = offset * MAX_OPS_PER_REQUEST
         end = start + MAX_OPS_PER_REQUEST
@@ -309,13 +433,11 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
     ) -> (List[UserOperation], List[str]):
         user_operations = []
         found_user_operations_hashs = []
-        for sender_address in list(self.senders_to_senders_mempools):
-            sender = self.senders_to_senders_mempools[sender_address]
-            if len(sender.user_operation_hashs_to_user_operation) > 0:
-                for user_operation_hash, user_operation in sender.user_operation_hashs_to_user_operation.items():
-                    if user_operation_hash in user_operations_hashs:
-                        user_operations.append(user_operation.get_user_operation_json())
-                        found_user_operations_hashs.append(user_operation_hash)
+        for sender in self.senders_to_senders_mempools.values():
+            for user_operation_hash, user_operation in sender.user_operation_hashs_to_user_operation.items():
+                if user_operation_hash in user_operations_hashs:
+                    user_operations.append(user_operation.get_user_operation_json())
+                    found_user_operations_hashs.append(user_operation_hash)
         
         remaining_user_operation_hashes = set(user_operations_hashs) - set(found_user_operations_hashs)
         return user_operations, list(remaining_user_operation_hashes)
@@ -331,13 +453,15 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
     def update_all_seen_status(
         self, sender_address: str, factory_address: str, paymaster_address: str
     ) -> None:
-        self.reputation_manager.update_seen_status(sender_address)
+        entities = [sender_address]
 
         if factory_address is not None:
-            self.reputation_manager.update_seen_status(factory_address)
+            entities.append(factory_address)
 
         if paymaster_address is not None:
-            self.reputation_manager.update_seen_status(paymaster_address)
+            entities.append(paymaster_address)
+
+        self.reputation_manager.update_seen_status_many(entities)
         
     def queue_useroperations_with_entrypoint_to_gossip_publish(
             self,
@@ -376,20 +500,17 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
         self, sender_address: str, factory_address: str, paymaster_address: str
     ) -> None:
         sender_no_of_ops = 0
-        if sender_address in self.senders_to_senders_mempools:
-            sender_no_of_ops = len(
-                self.senders_to_senders_mempools[sender_address].user_operation_hashs_to_user_operation
-            )
+        sender = self.senders_to_senders_mempools.get(sender_address)
+        if sender is not None:
+            sender_no_of_ops = len(sender.user_operation_hashs_to_user_operation)
         self._verify_entity_reputation(
             sender_address, "sender", sender_no_of_ops
         )
 
         if factory_address is not None:
-            factory_no_of_ops = 0
-            if factory_address in self.entity_to_no_of_ops_in_mempool:
-                factory_no_of_ops = self.entity_to_no_of_ops_in_mempool[
-                    factory_address
-                ]
+            factory_no_of_ops = self.entity_to_no_of_ops_in_mempool.get(
+                factory_address, 0
+            )
             self._verify_entity_reputation(
                 factory_address,
                 "factory",
@@ -397,11 +518,9 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
             )
 
         if paymaster_address is not None:
-            paymaster_no_of_ops = 0
-            if paymaster_address in self.entity_to_no_of_ops_in_mempool:
-                paymaster_no_of_ops = self.entity_to_no_of_ops_in_mempool[
-                    paymaster_address
-                ]
+            paymaster_no_of_ops = self.entity_to_no_of_ops_in_mempool.get(
+                paymaster_address, 0
+            )
             self._verify_entity_reputation(
                 paymaster_address,
                 "paymaster",
@@ -411,41 +530,20 @@ class LocalMempoolManagerVersion0Point6(LocalMempoolManager):
     def _verify_entity_reputation(
         self, entity_address: str, entity_name: str, entity_no_of_ops: int
     ) -> None:
-        if entity_address not in self.entity_to_no_of_ops_in_mempool:
-            self.entity_to_no_of_ops_in_mempool[entity_address] = 0
-
-        entity_no_of_ops = self.entity_to_no_of_ops_in_mempool[entity_address]
         status = self.reputation_manager.get_status(entity_address)
         if status == ReputationStatus.BANNED:
             raise ValidationException(
                 ValidationExceptionCode.Reputation,
-                " ".join(
-                    (
-                        "user operation was dropped because ",
-                        entity_address,
-                        "is banned",
-                        entity_name,
-                    )
-                ),
+                f"user operation was dropped because {entity_address} is banned {entity_name}",
             )
         elif status == ReputationStatus.THROTTLED and entity_no_of_ops > 0:
             raise ValidationException(
                 ValidationExceptionCode.Reputation,
-                " ".join(
-                    (
-                        "user operation was dropped",
-                        entity_address,
-                        "is throttled",
-                        entity_name,
-                    )
-                ),
+                f"user operation was dropped {entity_address} is throttled {entity_name}",
             )
 
     def _update_entity_no_of_ops_in_mempool(self, entity_address: str) -> None:
-        no_of_ops = 0
-        if entity_address in self.entity_to_no_of_ops_in_mempool:
-            no_of_ops = self.entity_to_no_of_ops_in_mempool[entity_address]
-        self.entity_to_no_of_ops_in_mempool[entity_address] = no_of_ops + 1
+        self.entity_to_no_of_ops_in_mempool[entity_address] += 1
 
 @cache
 def encode_uint256(x):
@@ -102,9 +102,12 @@ class SenderMempool:
 
     def _get_user_operation_hash_with_same_nonce(
         self, nonce
-    ) -> UserOperation | None:
-        for user_operation_hash in self.user_operation_hashs_to_user_operation:
-            if self.user_operation_hashs_to_user_operation[user_operation_hash].nonce == nonce:
+    ) -> str | None:
+        for (
+            user_operation_hash,
+            user_operation,
+        ) in self.user_operation_hashs_to_user_operation.items():
+            if user_operation.nonce == nonce:
                 return user_operation_hash
         return None
 
@@ -73,12 +73,17 @@ class ReputationManager:
         return self.entities_reputation[entity_address]
 
     def update_seen_status(self, entity: str):
-        if entity not in self.entities_reputation:
-            self.entities_reputation[entity] = ReputationEntry(
-                0, 0, ReputationStatus.OK
-            )
-        ops_seen = self.entities_reputation[entity].ops_seen
-        self.entities_reputation[entity].ops_seen = ops_seen + 1
+        self.update_seen_status_many([entity])
+
+    def update_seen_status_many(self, entities: list[str]):
+        entities_reputation = self.entities_reputation
+        for entity in entities:
+            entry = entities_reputation.get(entity)
+            if entry is None:
+                entry = entities_reputation[entity] = ReputationEntry(
+                    0, 0, ReputationStatus.OK
+                )
+            entry.ops_seen += 1
 
     def update_included_status(self, entity: str):
         if entity not in self.entities_reputation:
@@ -123,7 +128,7 @@ class ReputationManager:
         self, entitiy: str, ops_seen: int, ops_included: int, status: int
     ):
         reputation_entry = ReputationEntry(ops_seen, ops_included, status)
-        self.entities_reputation[entitiy] = reputation_entry
+        self.entities_reputation[entitiy.lower()] = reputation_entry
 
     def get_entities_reputation_json(self):
         entities_reputation_json = {}
@@ -1,10 +1,13 @@
 import asyncio
+from collections import OrderedDict
+import itertools
 import time
 import os
 
-from eth_utils import to_checksum_address, keccak
-from eth_abi import decode, encode
+from eth_utils import to_checksum_address
+from eth_abi import encode
 
+from voltaire_bundler.utils.keccak import keccak
 from voltaire_bundler.user_operation.user_operation_handler import (
     UserOperationHandler,
 )
@@ -18,18 +21,75 @@ from voltaire_bundler.bundler.exceptions import (
     ValidationException,
     ValidationExceptionCode,
 )
+from voltaire_bundler.utils.async_utils import gather_or_cancel
 from voltaire_bundler.utils.eth_client_utils import (
+    EXECUTION_REVERTED_MESSAGE,
     send_rpc_request_to_eth_client,
+    send_rpc_batch_request_to_eth_client,
+    get_latest_block_hash,
     DebugTraceCallData,
     DebugEntityData,
     Call,
 )
-from voltaire_bundler.utils.decode import decode_FailedOp_event
+from voltaire_bundler.utils.decode import (
+    decode_FailedOp_event,
+    decode_validation_result,
+    get_abi_decoder,
+)
 from voltaire_bundler.utils.encode import encode_simulate_validation_calldata
 from voltaire_bundler.bundler.gas_manager import GasManager
 
+MAX_CACHED_SIMULATION_RESULTS = 1024
+MAX_CODE_HASH_CALLS_PER_BATCH = 64
+MAX_INFLIGHT_CODE_HASH_BATCHES = 4
+
+VALIDATE_USER_OP_PARAMS_ABI = (
+    "bytes32",  # userOp (head offset)
+    "bytes32",  # userOpHash
+    "uint256",  # missingAccountFunds
+)
+decode_validate_user_op_params = get_abi_decoder(VALIDATE_USER_OP_PARAMS_ABI)
+
+BANNED_OPCODES = frozenset(
+    [
+        "GAS",
+        "NUMBER",
+        "TIMESTAMP",
+        "COINBASE",
+        "DIFFICULTY",
+        "BASEFEE",
+        "GASLIMIT",
+        "GASPRICE",
+        "SELFBALANCE",
+        "BALANCE",
+        "ORIGIN",
+        "BLOCKHASH",
+        "CREATE",
+        # "CREATE2",
+        "SELFDESTRUCT",
+        "RANDOM",
+        "PREVRANDAO",
+    ]
+)
 
 class ValidationManager:
+    __slots__ = (
+        "user_operation_handler",
+        "ethereum_node_url",
+        "gas_manager",
+        "bundler_private_key",
+        "bundler_address",
+        "chain_id",
+        "bundler_collector_tracer",
+        "bundler_helper_byte_code",
+        "is_unsafe",
+        "is_legacy_mode",
+        "whitelist_entity_storage_access",
+        "enforce_gas_price_tolerance",
+        "ethereum_node_debug_trace_call_url",
+        "simulation_results_cache",
+    )
+
     user_operation_handler: UserOperationHandler
     ethereum_node_url: str
     gas_manager: GasManager
@@ -37,13 +97,13 @@ class ValidationManager:
     bundler_address: str
     chain_id: int
     bundler_collector_tracer: str
-    banned_opcodes: list()
     bundler_helper_byte_code: str
     is_unsafe: bool
     is_legacy_mode: bool
     whitelist_entity_storage_access: list()
     enforce_gas_price_tolerance: int
     ethereum_node_debug_trace_call_url:str
+    simulation_results_cache: OrderedDict[tuple[str, str, str, str], dict]
 
     def __init__(
         self,
@@ -72,6 +132,7 @@ class ValidationManager:
         self.whitelist_entity_storage_access = whitelist_entity_storage_access
         self.enforce_gas_price_tolerance = enforce_gas_price_tolerance
         self.ethereum_node_debug_trace_call_url = ethereum_node_debug_trace_call_url
+        self.simulation_results_cache = OrderedDict()
 
         package_directory = os.path.dirname(os.path.abspath(__file__))
         BundlerCollectorTracer_file = os.path.join(
@@ -80,26 +141,6 @@ class ValidationManager:
         with open(BundlerCollectorTracer_file) as keyfile:
             self.bundler_collector_tracer = keyfile.read()
 
-        self.banned_opcodes = [
-            "GAS",
-            "NUMBER",
-            "TIMESTAMP",
-            "COINBASE",
-            "DIFFICULTY",
-            "BASEFEE",
-            "GASLIMIT",
-            "GASPRICE",
-            "SELFBALANCE",
-            "BALANCE",
-            "ORIGIN",
-            "BLOCKHASH",
-            "CREATE",
-            # "CREATE2",
-            "SELFDESTRUCT",
-            "RANDOM",
-            "PREVRANDAO",
-        ]
-
     async def validate_user_operation(
         self,
         user_operation: UserOperation,
@@ -116,10 +157,9 @@ class ValidationManager:
         # )
 
         if self.is_unsafe:
-            (
-                selector,
-                validation_result,
-            ) = await self.simulate_validation_without_tracing(user_operation, entrypoint)
+            error_data = await self.simulate_validation_without_tracing(
+                user_operation, entrypoint
+            )
         else:
             debug_data: str = await self.simulate_validation_with_tracing(
                 user_operation,
@@ -127,31 +167,21 @@ class ValidationManager:
                 gas_price_hex,
                 block_number
             )
-            selector = debug_data["debug"][-2]["REVERT"][:10]
-            validation_result = debug_data["debug"][-2]["REVERT"][10:]
-
-        if ValidationManager.check_if_failed_op_error(selector):
-            _, reason = ValidationManager.decode_FailedOp_event(
-                validation_result
-            )
-            raise ValidationException(
-                ValidationExceptionCode.SimulateValidation,
-                "revert reason : " + reason + " " + bytes.fromhex(validation_result[-64:]).decode("ascii"),
-            )
+            error_data = bytes.fromhex(debug_data["debug"][-2]["REVERT"][2:])
 
         (
             return_info,
             sender_stake_info,
             factory_stake_info,
             paymaster_stake_info,
-            is_sender_staked,
-        ) = ValidationManager.decode_validation_result(validation_result)
+        ) = ValidationManager.decode_simulate_validation_revert(error_data)
+        is_sender_staked = ValidationManager.is_staked(sender_stake_info)
 
         self.verify_sig_and_timestamp(user_operation, return_info)
 
         if self.is_unsafe:
             user_operation_hash = UserOperationHandler.get_user_operation_hash(
-                user_operation.to_list(), entrypoint, self.chain_id
+                user_operation.to_tuple(), entrypoint, self.chain_id
             )
         else:
             debug_data_formated = (
@@ -175,7 +205,7 @@ class ValidationManager:
 
     async def simulate_validation_without_tracing(
         self, user_operation: UserOperation, entrypoint:str
-    ) -> tuple[str, str]:
+    ) -> bytes:
         call_data = encode_simulate_validation_calldata(user_operation)
 
         params = [
@@ -190,31 +220,37 @@ class ValidationManager:
         result = await send_rpc_request_to_eth_client(
             self.ethereum_node_url, "eth_call", params
         )
-        if (
-            "error" not in result
-            or "execution reverted" not in result["error"]["message"]
-        ):
+        error = result.get("error")
+        if error is None or EXECUTION_REVERTED_MESSAGE not in error["message"]:
             raise ValueError("simulateValidation didn't revert!")
 
-        elif (
-            "data" not in result["error"] or len(result["error"]["data"]) < 10
-        ):
+        error_data_hex = error.get("data")
+        if error_data_hex is None or len(error_data_hex) < 10:
             raise ValidationException(
                 ValidationExceptionCode.SimulateValidation,
-                result["error"]["message"],
+                error["message"],
             )
 
-        error_data = result["error"]["data"]
-        solidity_error_selector = str(error_data[:10])
-        solidity_error_params = error_data[10:]
-
-        return solidity_error_selector, solidity_error_params
+        return bytes.fromhex(error_data_hex[2:])
 
     async def simulate_validation_with_tracing(
         self, user_operation: UserOperation, entrypoint:str, gas_price_hex: int, block_number:str
     ) -> str:
         call_data = encode_simulate_validation_calldata(user_operation)
 
+        # the trace is deterministic for a pinned block, so the same
+        # operation received again (e.g. from several peers) is not retraced.
+        # the cache is keyed by block hash so a reorg at the same height
+        # doesn't serve a trace taken on another block
+        if len(block_number) == 66:
+            block_hash = block_number
+        else:
+            block_hash = get_latest_block_hash(self.ethereum_node_url, block_number)
+        cache_key = (entrypoint, call_data, gas_price_hex, block_hash)
+        if block_hash is not None and cache_key in self.simulation_results_cache:
+            self.simulation_results_cache.move_to_end(cache_key)
+            return self.simulation_results_cache[cache_key]
+
         params = [
             {
                 "from": self.bundler_address,
@@ -233,6 +269,10 @@ class ValidationManager:
 
         if "result" in res:
             debug_data = res["result"]
+            if block_hash is not None:
+                self.simulation_results_cache[cache_key] = debug_data
+                if len(self.simulation_results_cache) > MAX_CACHED_SIMULATION_RESULTS:
+                    self.simulation_results_cache.popitem(last=False)
             return debug_data
 
         elif "error" in res and "message" in res["error"]:
@@ -259,11 +299,11 @@ class ValidationManager:
         factory_opcodes = debug_data.factory_data.opcodes
         account_opcodes = debug_data.account_data.opcodes
         paymaster_opcodes = debug_data.paymaster_data.opcodes
-        await self.check_banned_op_codes(
+        self.check_banned_op_codes(
             factory_opcodes, account_opcodes, paymaster_opcodes
         )
 
-        sender_address_lowercase = user_operation.sender_address.lower()
+        sender_address_lowercase = user_operation.sender_address_lowercase
         factory_address_lowercase = user_operation.factory_address_lowercase
         paymaster_address_lowercase = (
             user_operation.paymaster_address_lowercase
@@ -343,9 +383,14 @@ class ValidationManager:
                 )
 
         if len(associated_addresses_lowercase) > 0:
+            # the addresses are deduplicated and sorted so that operations
+            # touching the same contracts share one code hash check when
+            # bundling
             associated_addresses = [
                 to_checksum_address(lower_case_address)
-                for lower_case_address in associated_addresses_lowercase
+                for lower_case_address in sorted(
+                    set(associated_addresses_lowercase)
+                )
             ]
 
         if len(associated_addresses) > 0:
@@ -434,17 +479,15 @@ class ValidationManager:
                         ),
                     )
 
-    async def check_banned_op_codes(
+    def check_banned_op_codes(
         self,
         factory_opcodes: dict[str:int],
         account_opcodes: dict[str:int],
         paymaster_opcodes: dict[str:int],
     ) -> None:
-        await asyncio.gather(
-            self.verify_banned_opcodes(factory_opcodes, "factory", True),
-            self.verify_banned_opcodes(account_opcodes, "account"),
-            self.verify_banned_opcodes(paymaster_opcodes, "paymaster"),
-        )
+        self.verify_banned_opcodes(factory_opcodes, "factory", True)
+        self.verify_banned_opcodes(account_opcodes, "account")
+        self.verify_banned_opcodes(paymaster_opcodes, "paymaster")
 
     def format_debug_traceCall_data(debug_data: str) -> DebugEntityData:
         factory_data = DebugEntityData(
@@ -475,7 +518,7 @@ class ValidationManager:
 
         return debug_trace_call_data
 
-    async def verify_banned_opcodes(
+    def verify_banned_opcodes(
         self,
         opcodes: dict[str:int],
         opcode_source: str,
@@ -484,9 +527,9 @@ class ValidationManager:
         # found_opcodes = {
         #     opcode
         #     for opcode in opcodes.keys()
-        #     if opcode in self.banned_opcodes
+        #     if opcode in BANNED_OPCODES
         # }
-        found_opcodes = opcodes.keys() & self.banned_opcodes
+        found_opcodes = opcodes.keys() & BANNED_OPCODES
         number_of_opcodes = len(found_opcodes)
         if number_of_opcodes > 0:
             opcodes_str = " ".join([opcode for opcode in found_opcodes])
@@ -505,21 +548,64 @@ class ValidationManager:
                 )
 
     async def get_addresses_code_hash(self, addresses: list[str]) -> str:
+        result = await send_rpc_request_to_eth_client(
+            self.ethereum_node_url,
+            "eth_call",
+            self.get_addresses_code_hash_params(addresses),
+        )
+        if "error" not in result:
+            raise ValueError("BundlerHelper should revert")
+
+        return result["error"]["data"]
+
+    async def get_addresses_code_hashes(
+        self, addresses_lists: list[list[str]]
+    ) -> list[str]:
+        # the BundlerHelper eth_calls are sent in batch requests of bounded
+        # size with a bounded number in flight to not trip the eth client
+        # batch and rate limits on large mempools
+        semaphore = asyncio.Semaphore(MAX_INFLIGHT_CODE_HASH_BATCHES)
+
+        async def send_batch(batch_addresses_lists: list[list[str]]):
+            async with semaphore:
+                return await send_rpc_batch_request_to_eth_client(
+                    self.ethereum_node_url,
+                    [
+                        (
+                            "eth_call",
+                            self.get_addresses_code_hash_params(addresses),
+                        )
+                        for addresses in batch_addresses_lists
+                    ],
+                )
+
+        batches_results = await gather_or_cancel(
+            *(
+                send_batch(
+                    addresses_lists[start:start + MAX_CODE_HASH_CALLS_PER_BATCH]
+                )
+                for start in range(
+                    0, len(addresses_lists), MAX_CODE_HASH_CALLS_PER_BATCH
+                )
+            )
+        )
+        code_hashes = []
+        for result in itertools.chain.from_iterable(batches_results):
+            if "error" not in result:
+                raise ValueError("BundlerHelper should revert")
+            code_hashes.append(result["error"]["data"])
+
+        return code_hashes
+
+    def get_addresses_code_hash_params(self, addresses: list[str]) -> list:
         call_data = encode(["address[]"], [addresses])
-        params = [
+        return [
             {
                 "from": self.bundler_address,
                 "data": "0x" + self.bundler_helper_byte_code + call_data.hex(),
             },
             "latest",
         ]
-        result = await send_rpc_request_to_eth_client(
-            self.ethereum_node_url, "eth_call", params
-        )
-        if "error" not in result:
-            raise ValueError("BundlerHelper should revert")
-
-        return result["error"]["data"]
 
     def verify_sig_and_timestamp(
         self, user_operation: UserOperation, return_info: ReturnInfo
@@ -575,65 +661,22 @@ class ValidationManager:
         return entity_stake.stake > 1 and entity_stake.unstakeDelaySec > 1
 
     @staticmethod
-    def check_if_failed_op_error(solidity_error_selector: str) -> bool:
-        return solidity_error_selector == FailedOpRevertData.SELECTOR
+    def check_if_failed_op_error(solidity_error_selector: int) -> bool:
+        return solidity_error_selector == FailedOpRevertData.SELECTOR_INT
 
     @staticmethod
-    def decode_validation_result(
-        solidity_error_params: str,
+    def decode_simulate_validation_revert(
+        error_data: bytes,
     ) -> tuple[ReturnInfo, StakeInfo, StakeInfo, StakeInfo]:
-        VALIDATION_RESULT_ABI = [
-            "(uint256,uint256,bool,uint64,uint64,bytes)",
-            "(uint256,uint256)",
-            "(uint256,uint256)",
-            "(uint256,uint256)",
-        ]
-        try:
-            validation_result_decoded = decode(
-                VALIDATION_RESULT_ABI, bytes.fromhex(solidity_error_params)
-            )
-        except Exception as err:
-            operation_index, reason = decode_FailedOp_event(
-                solidity_error_params
-            )
+        solidity_error_params = error_data[4:]
+        if error_data.startswith(FailedOpRevertData.SELECTOR_BYTES):
+            _, reason = decode_FailedOp_event(solidity_error_params)
             raise ValidationException(
                 ValidationExceptionCode.SimulateValidation,
-                reason,
+                "revert reason : " + reason + " " + solidity_error_params[-32:].decode("ascii"),
             )
 
-        return_info_arr = validation_result_decoded[0]
-        return_info = ReturnInfo(
-            preOpGas=return_info_arr[0],
-            prefund=return_info_arr[1],
-            sigFailed=return_info_arr[2],
-            validAfter=return_info_arr[3],
-            validUntil=return_info_arr[4],
-        )
-
-        sender_info_arr = validation_result_decoded[1]
-        sender_info = StakeInfo(
-            stake=sender_info_arr[0], unstakeDelaySec=sender_info_arr[1]
-        )
-
-        factory_info_arr = validation_result_decoded[2]
-        factory_info = StakeInfo(
-            stake=factory_info_arr[0], unstakeDelaySec=factory_info_arr[1]
-        )
-
-        paymaster_info_arr = validation_result_decoded[3]
-        paymaster_info = StakeInfo(
-            stake=paymaster_info_arr[0], unstakeDelaySec=paymaster_info_arr[1]
-        )
-
-        is_sender_staked = ValidationManager.is_staked(sender_info)
-
-        return (
-            return_info,
-            sender_info,
-            factory_info,
-            paymaster_info,
-            is_sender_staked,
-        )
+        return decode_validation_result(solidity_error_params)
 
     @staticmethod
     def parse_entity_slots(entities: list[str], keccak_list_unique: list[str]):
@@ -721,9 +764,8 @@ class ValidationManager:
             ),
             None,
         )
-        decoded_result = decode(
-            ["bytes32", "bytes32", "uint256"],
-            bytes.fromhex(encodedInfo[10:]),
+        decoded_result = decode_validate_user_op_params(
+            bytes.fromhex(encodedInfo[10:])
         )
         user_operation_hash = "0x" + decoded_result[1].hex()
         return user_operation_hash
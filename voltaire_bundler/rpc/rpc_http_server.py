@@ -1,6 +1,8 @@
+import json
 import logging
 from functools import partial
 from aiohttp import web
+import orjson
 import aiohttp_cors
 from jsonrpcserver import (
     method,
@@ -196,8 +198,15 @@ async def debug_bundler_dumpReputation(entrypoint: str) -> Result:
 async def web3_bundlerVersion() -> Result:
     return Success(version("voltaire_bundler"))
 
+def serialize_response(response: Any) -> bytes:
+    try:
+        return orjson.dumps(response)
+    except TypeError:
+        # orjson only serializes integers up to 64 bits
+        return json.dumps(response).encode()
+
 async def handle(is_debug: bool, request:web.Request)->web.Response:
-    res = await request.text()
+    res = await request.read()
     methods = {
         "eth_chainId": eth_chainId,
         "eth_supportedEntryPoints": eth_supportedEntryPoints,
@@ -218,8 +227,15 @@ async def handle(is_debug: bool, request:web.Request)->web.Response:
         }
         methods.update(debug_methods)
 
+    response = await async_dispatch(
+        res,
+        methods=methods,
+        deserializer=orjson.loads,
+        serializer=serialize_response,
+    )
     return web.Response(
-        text=await async_dispatch(res, methods=methods),
+        # the dispatcher returns "" for notifications
+        body=response or b"",
         content_type="application/json",
     )
 
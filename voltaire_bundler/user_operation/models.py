@@ -1,8 +1,8 @@
 from dataclasses import field, dataclass
+from typing import NamedTuple
 
 
-@dataclass
-class ReturnInfo:
+class ReturnInfo(NamedTuple):
     # SELECTOR = "0xf04297e9"
     preOpGas: int | str
     prefund: int | str
@@ -11,8 +11,7 @@ class ReturnInfo:
     validUntil: int | str
 
 
-@dataclass
-class StakeInfo:
+class StakeInfo(NamedTuple):
     stake: int | str
     unstakeDelaySec: int | str
 
@@ -20,6 +19,8 @@ class StakeInfo:
 @dataclass
 class FailedOpRevertData:
     SELECTOR = "0x00fa072b"
+    SELECTOR_INT = int(SELECTOR, 16)
+    SELECTOR_BYTES = bytes.fromhex(SELECTOR[2:])
     opIndex: int | str
     paymaster: str
     reason: str
@@ -7,6 +7,22 @@ import re
 
 from voltaire_bundler.typing import MempoolId
 
+USER_OPERATION_FIELDS = frozenset(
+    (
+        "sender_address",
+        "nonce",
+        "init_code",
+        "call_data",
+        "call_gas_limit",
+        "verification_gas_limit",
+        "pre_verification_gas",
+        "max_fee_per_gas",
+        "max_priority_fee_per_gas",
+        "paymaster_and_data",
+        "signature",
+    )
+)
+
 
 @dataclass()
 class UserOperation:
@@ -23,6 +39,7 @@ class UserOperation:
     signature: bytes
     code_hash: str | None
     associated_addresses: list()
+    sender_address_lowercase: str
     factory_address_lowercase: str | None
     paymaster_address_lowercase: str | None
     valid_mempools_ids: MempoolId
@@ -35,6 +52,7 @@ class UserOperation:
                 ValidationExceptionCode.InvalidFields,
                 "Invalide UserOperation",
             )
+        self._fields_tuple = None
         self.verify_fields_exist(jsonRequestDict)
 
         self.sender_address = verify_and_get_address(jsonRequestDict["sender"])
@@ -94,21 +112,6 @@ class UserOperation:
                     f"UserOperation missing {field} field",
                 )
 
-    def get_user_operation_dict(self) -> tuple:
-        return {
-            "sender": self.sender_address,
-            "nonce": self.nonce,
-            "initCode": self.init_code,
-            "callData": self.call_data,
-            "callGasLimit": self.call_gas_limit,
-            "verificationGasLimit": self.verification_gas_limit,
-            "preVerificationGas": self.pre_verification_gas,
-            "maxFeePerGas": self.max_fee_per_gas,
-            "maxPriorityFeePerGas": self.max_priority_fee_per_gas,
-            "paymasterAndData": self.paymaster_and_data,
-            "signature": self.signature,
-        }
-
     def get_user_operation_json(self):
         return {
             "sender": self.sender_address,
@@ -124,20 +127,32 @@ class UserOperation:
             "signature": "0x" + self.signature.hex(),
         }
 
+    def __setattr__(self, name, value):
+        if name in USER_OPERATION_FIELDS:
+            object.__setattr__(self, "_fields_tuple", None)
+            if name == "sender_address":
+                object.__setattr__(self, "sender_address_lowercase", value.lower())
+        object.__setattr__(self, name, value)
+
+    def to_tuple(self) -> tuple:
+        if self._fields_tuple is None:
+            self._fields_tuple = (
+                self.sender_address,
+                self.nonce,
+                self.init_code,
+                self.call_data,
+                self.call_gas_limit,
+                self.verification_gas_limit,
+                self.pre_verification_gas,
+                self.max_fee_per_gas,
+                self.max_priority_fee_per_gas,
+                self.paymaster_and_data,
+                self.signature,
+            )
+        return self._fields_tuple
+
     def to_list(self) -> list:
-        return [
-            self.sender_address,
-            self.nonce,
-            self.init_code,
-            self.call_data,
-            self.call_gas_limit,
-            self.verification_gas_limit,
-            self.pre_verification_gas,
-            self.max_fee_per_gas,
-            self.max_priority_fee_per_gas,
-            self.paymaster_and_data,
-            self.signature,
-        ]
+        return list(self.to_tuple())
 
     def _set_factory_and_paymaster_address(self):
         if len(self.init_code) > 20:
@@ -1,19 +1,9 @@
-import asyncio
-from functools import reduce
-import math
+from functools import lru_cache, reduce
 
-from eth_utils import to_checksum_address, keccak
+from eth_utils import to_checksum_address
 from eth_abi import encode, decode
 
-from .user_operation import UserOperation
-from voltaire_bundler.bundler.exceptions import (
-    ValidationException,
-    ValidationExceptionCode,
-)
-from voltaire_bundler.bundler.exceptions import (
-    ExecutionException,
-    ExecutionExceptionCode,
-)
+from voltaire_bundler.utils.keccak import keccak
 from voltaire_bundler.utils.eth_client_utils import (
     send_rpc_request_to_eth_client,
 )
@@ -306,16 +296,11 @@ class UserOperationHandler:
     def get_user_operation_hash(
         user_operation_list: list(), entrypoint_addr: str, chain_id: int
     ):
-        packed_user_operation = keccak(
-            UserOperationHandler.pack_user_operation(user_operation_list)
-        )
-
-        encoded_user_operation_hash = encode(
-            ["(bytes32,address,uint256)"],
-            [[packed_user_operation, entrypoint_addr, chain_id]],
+        # resubmitted and revalidated operations are hashed again with the
+        # same fields, so the hash is cached by the packed fields
+        return get_user_operation_hash_from_fields(
+            tuple(user_operation_list), entrypoint_addr, chain_id
         )
-        user_operation_hash = "0x" + keccak(encoded_user_operation_hash).hex()
-        return user_operation_hash
 
     @staticmethod
     def pack_user_operation(
@@ -369,3 +354,19 @@ class UserOperationHandler:
         ]
         inputResult = decode(INPUT_ABI, bytes.fromhex(handle_op_input[10:]))
         return inputResult[0][0]
+
+
+@lru_cache(maxsize=1024)
+def get_user_operation_hash_from_fields(
+    user_operation_fields: tuple, entrypoint_addr: str, chain_id: int
+) -> str:
+    packed_user_operation = keccak(
+        UserOperationHandler.pack_user_operation(list(user_operation_fields))
+    )
+
+    encoded_user_operation_hash = encode(
+        ["(bytes32,address,uint256)"],
+        [[packed_user_operation, entrypoint_addr, chain_id]],
+    )
+    user_operation_hash = "0x" + keccak(encoded_user_operation_hash).hex()
+    return user_operation_hash
@@ -0,0 +1,15 @@
+import asyncio
+
+
+async def gather_or_cancel(*aws) -> list:
+    # like asyncio.gather, but if one of the awaitables raises, the others
+    # are cancelled and awaited instead of being left running with their
+    # exceptions never retrieved
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -1,33 +1,103 @@
-from eth_abi import decode
 from functools import cache
 
-@cache
-@staticmethod
-def decode_FailedOp_event(solidity_error_params: str) -> tuple[str, str]:
-    FAILED_OP_PARAMS_API = ["uint256", "string"]
-    failed_op_params_res = decode(
-        FAILED_OP_PARAMS_API, bytes.fromhex(solidity_error_params)
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.registry import registry
+
+from voltaire_bundler.bundler.exceptions import (
+    ValidationException,
+    ValidationExceptionCode,
+)
+from voltaire_bundler.user_operation.models import ReturnInfo, StakeInfo
+
+
+def get_abi_decoder(types: tuple[str, ...]):
+    # the types are parsed and the decoders looked up only once,
+    # the returned function only walks the data
+    decoder = TupleDecoder(
+        decoders=[registry.get_decoder(type_str) for type_str in types]
     )
+
+    def decode_abi(data: bytes) -> tuple:
+        return decoder(ContextFramesBytesIO(data))
+
+    return decode_abi
+
+
+FAILED_OP_PARAMS_ABI = ("uint256", "string")
+decode_failed_op_params = get_abi_decoder(FAILED_OP_PARAMS_ABI)
+
+VALIDATION_RESULT_PARAMS_ABI = (
+    "(uint256,uint256,bool,uint64,uint64,bytes)",  # returnInfo
+    "(uint256,uint256)",  # senderInfo
+    "(uint256,uint256)",  # factoryInfo
+    "(uint256,uint256)",  # paymasterInfo
+)
+decode_validation_result_params = get_abi_decoder(VALIDATION_RESULT_PARAMS_ABI)
+
+EXECUTION_RESULT_PARAMS_ABI = (
+    "uint256",  # preOpGas
+    "uint256",  # paid
+    "uint48",  # validAfter
+    "uint48",  # validUntil
+    "bool",  # targetSuccess
+    "bytes",  # targetResult
+)
+decode_execution_result_params = get_abi_decoder(EXECUTION_RESULT_PARAMS_ABI)
+
+ERROR_STRING_PARAMS_ABI = ("string",)  # Error(string)
+decode_error_string_params = get_abi_decoder(ERROR_STRING_PARAMS_ABI)
+
+GAS_ESTIMATE_L1_COMPONENT_RESULT_ABI = (
+    "uint64",  # gasEstimateForL1
+    "uint256",  # baseFee
+    "uint256",  # l1BaseFeeEstimate
+)
+decode_gas_estimate_l1_component_result = get_abi_decoder(
+    GAS_ESTIMATE_L1_COMPONENT_RESULT_ABI
+)
+
+
+# FailedOp(uint256 opIndex, string reason) from EntryPoint v0.6
+FAILED_OP_SELECTOR = bytes.fromhex("220266b6")
+
+
+@cache
+def decode_FailedOp_event(solidity_error_params: bytes) -> tuple[str, str]:
+    failed_op_params_res = decode_failed_op_params(solidity_error_params)
     operation_index = failed_op_params_res[0]
     reason = failed_op_params_res[1]
 
     return operation_index, reason
 
 
-@staticmethod
+def decode_validation_result(
+    solidity_error_params: bytes,
+) -> tuple[ReturnInfo, StakeInfo, StakeInfo, StakeInfo]:
+    try:
+        validation_result_decoded = decode_validation_result_params(
+            solidity_error_params
+        )
+    except Exception:
+        _, reason = decode_FailedOp_event(solidity_error_params)
+        raise ValidationException(
+            ValidationExceptionCode.SimulateValidation,
+            reason,
+        )
+
+    # returnInfo also carries paymasterContext, which is not needed here
+    return_info = ReturnInfo._make(validation_result_decoded[0][:5])
+    sender_info = StakeInfo._make(validation_result_decoded[1])
+    factory_info = StakeInfo._make(validation_result_decoded[2])
+    paymaster_info = StakeInfo._make(validation_result_decoded[3])
+
+    return return_info, sender_info, factory_info, paymaster_info
+
+
 def decode_ExecutionResult(
-    solidity_error_params: str,
+    solidity_error_params: bytes,
 ) -> tuple[str, str, bool, str]:
-    EXECUTION_RESULT_PARAMS_API = [
-        "uint256",  # preOpGas
-        "uint256",  # paid
-        "uint48",  # validAfter
-        "uint48",  # validUntil
-        "bool",  # targetSuccess
-        "bytes",  # targetResult
-    ]
-    execution_result__params_res = decode(
-        EXECUTION_RESULT_PARAMS_API, bytes.fromhex(solidity_error_params)
+    execution_result__params_res = decode_execution_result_params(
+        solidity_error_params
     )
     preOpGas = execution_result__params_res[0]
     paid = execution_result__params_res[1]
@@ -37,17 +107,28 @@ def decode_ExecutionResult(
     return preOpGas, paid, targetSuccess, targetResult
 
 
-@staticmethod
 def decode_gasEstimateL1Component_result(raw_gas_results: str) -> int:
-    decoded_results = decode(
-        [
-            "uint64",  # gasEstimateForL1
-            "uint256",  # baseFee
-            "uint256",  # l1BaseFeeEstimate
-        ],
-        bytes.fromhex(raw_gas_results[2:]),
+    decoded_results = decode_gas_estimate_l1_component_result(
+        bytes.fromhex(raw_gas_results[2:])
     )
 
     gas_estimate_for_l1 = decoded_results[0]
 
     return gas_estimate_for_l1
+
+
+def decode_call_data_gas_used_result(raw_result: str) -> tuple[bool, int, bytes]:
+    # fixed (bool,uint256,bytes) layout returned by GasHelper, read directly
+    # as it is decoded on every probe of the call gas search
+    result = bytes.fromhex(raw_result[2:])
+    success = result[31] != 0
+    gas_used = int.from_bytes(result[32:64], "big")
+    data_offset = int.from_bytes(result[64:96], "big")
+    data_length = int.from_bytes(result[data_offset:data_offset + 32], "big")
+    data = result[data_offset + 32:data_offset + 32 + data_length]
+
+    return success, gas_used, data
+
+
+def decode_uint256_result(raw_result: str) -> int:
+    return int(raw_result[2:66], 16)
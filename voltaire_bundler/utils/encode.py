@@ -1,7 +1,44 @@
 from eth_abi import encode
+from eth_abi.encoding import TupleEncoder
+from eth_abi.registry import registry
 from voltaire_bundler.user_operation.user_operation import UserOperation
 
 
+def get_abi_encoder(types: tuple[str, ...]):
+    # the types are parsed and the encoders looked up only once,
+    # the returned encoder takes the values positionally
+    return TupleEncoder(
+        encoders=tuple(registry.get_encoder(type_str) for type_str in types)
+    )
+
+
+USER_OPERATION_ABI_TYPE = "(address,uint256,bytes,bytes,uint256,uint256,uint256,uint256,uint256,bytes,bytes)"
+
+# simulateValidation(entrypoint solidity function) will always revert
+SIMULATE_VALIDATION_FUNCTION_SELECTOR = "0xee219423"
+SIMULATE_VALIDATION_PARAMS_ABI = (USER_OPERATION_ABI_TYPE,)
+encode_simulate_validation_params = get_abi_encoder(
+    SIMULATE_VALIDATION_PARAMS_ABI
+)
+
+SIMULATE_HANDLE_OP_PARAMS_ABI = (
+    USER_OPERATION_ABI_TYPE,
+    "address",  # target
+    "bytes",  # targetCallData
+)
+encode_simulate_handle_op_params = get_abi_encoder(
+    SIMULATE_HANDLE_OP_PARAMS_ABI
+)
+
+GET_CALL_DATA_GAS_USED_PARAMS_ABI = ("address", "bytes", "bytes", "uint256")
+encode_get_call_data_gas_used_params = get_abi_encoder(
+    GET_CALL_DATA_GAS_USED_PARAMS_ABI
+)
+
+GET_L1_FEE_PARAMS_ABI = ("bytes",)
+encode_get_l1_fee_params = get_abi_encoder(GET_L1_FEE_PARAMS_ABI)
+
+
 @staticmethod
 def encode_handleops_calldata(
     user_operations_list: [], bundler_address: str
@@ -21,16 +58,9 @@ def encode_handleops_calldata(
 
 @staticmethod
 def encode_simulate_validation_calldata(user_operation: UserOperation) -> str:
-    # simulateValidation(entrypoint solidity function) will always revert
-    function_selector = "0xee219423"
-    params = encode(
-        [
-            "(address,uint256,bytes,bytes,uint256,uint256,uint256,uint256,uint256,bytes,bytes)"
-        ],
-        [user_operation.to_list()],
-    )
+    params = encode_simulate_validation_params((user_operation.to_tuple(),))
 
-    call_data = function_selector + params.hex()
+    call_data = SIMULATE_VALIDATION_FUNCTION_SELECTOR + params.hex()
     return call_data
 
 
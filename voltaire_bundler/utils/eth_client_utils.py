@@ -1,6 +1,47 @@
-from aiohttp import ClientSession
-import json
+from aiohttp import ClientSession, TCPConnector
+import asyncio
+import itertools
+import time
+import orjson
 from dataclasses import dataclass
+from voltaire_bundler.utils.async_utils import gather_or_cancel
+
+JSON_RPC_HEADERS = {"content-type": "application/json"}
+EXECUTION_REVERTED_MESSAGE = "execution reverted"
+json_rpc_request_ids = itertools.count(1)
+
+# the latest block changes at most once per block time, so concurrent
+# estimations and validations share one eth_getBlockByNumber per interval
+LATEST_BLOCK_INFO_CACHE_TTL_SECONDS = 0.5
+latest_block_info_cache: dict[str, tuple[float, tuple[str, int, str]]] = {}
+latest_block_info_locks: dict[str, asyncio.Lock] = {}
+# the number and hash of the latest block fetched from each eth client
+latest_block_hashes: dict[str, tuple[str, str]] = {}
+
+# eth clients that rejected a batch request as invalid or unknown, the
+# batched requests to them are sent one by one instead
+BATCH_NOT_SUPPORTED_ERROR_CODES = (-32600, -32601)
+eth_clients_without_batch_support: set[str] = set()
+
+# a single keep-alive session is shared by all the requests to the eth client
+# to avoid paying a new TCP/TLS handshake per request
+client_session: ClientSession | None = None
+
+
+def get_client_session() -> ClientSession:
+    global client_session
+    if client_session is None or client_session.closed:
+        client_session = ClientSession(
+            connector=TCPConnector(limit=100, keepalive_timeout=30)
+        )
+    return client_session
+
+
+async def close_client_session() -> None:
+    global client_session
+    if client_session is not None:
+        await client_session.close()
+        client_session = None
 
 
 async def send_rpc_request_to_eth_client(
@@ -8,29 +49,144 @@ async def send_rpc_request_to_eth_client(
 ) -> None:
     json_request = {
         "jsonrpc": "2.0",
-        "id": 1,
+        "id": next(json_rpc_request_ids),
         "method": method,
         "params": params,
     }
 
-    if params is not None:
-        json_request["params"] = params
-    async with ClientSession() as session:
-        async with session.post(
-            ethereum_node_url,
-            data=json.dumps(json_request),
-            headers={"content-type": "application/json"},
-        ) as response:
-            resp = await response.read()
-            return json.loads(resp)
-
-async def get_latest_block_info(ethereum_node_url) -> dict:
+    session = get_client_session()
+    async with session.post(
+        ethereum_node_url,
+        data=orjson.dumps(json_request),
+        headers=JSON_RPC_HEADERS,
+    ) as response:
+        resp = await response.read()
+        return orjson.loads(resp)
+
+async def send_rpc_batch_request_to_eth_client(
+    ethereum_node_url, methods_and_params: list[tuple[str, list | None]]
+) -> list[dict]:
+    # sends all the requests in a single JSON-RPC batch and returns the
+    # responses in the same order as the requests
+    if ethereum_node_url in eth_clients_without_batch_support:
+        return await send_rpc_requests_to_eth_client(
+            ethereum_node_url, methods_and_params
+        )
+
+    json_requests = [
+        {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params,
+        }
+        for request_id, (method, params) in enumerate(methods_and_params)
+    ]
+
+    session = get_client_session()
+    async with session.post(
+        ethereum_node_url,
+        data=orjson.dumps(json_requests),
+        headers=JSON_RPC_HEADERS,
+    ) as response:
+        resp = orjson.loads(await response.read())
+
+    if not isinstance(resp, list):
+        if not isinstance(resp, dict):
+            raise ValueError(
+                f"Invalid response to a JSON-RPC batch request : {resp}"
+            )
+        error = resp.get("error")
+        if (
+            not isinstance(error, dict)
+            or error.get("code") in BATCH_NOT_SUPPORTED_ERROR_CODES
+        ):
+            # the eth client does not support batch requests, it rejected
+            # the batch as invalid or answered it as a single request
+            eth_clients_without_batch_support.add(ethereum_node_url)
+        # other errors, like rate limits, are transient so the next
+        # requests to the eth client are batched again
+        return await send_rpc_requests_to_eth_client(
+            ethereum_node_url, methods_and_params
+        )
+
+    responses = [None] * len(json_requests)
+    for single_response in resp:
+        # responses with a null or unknown id can't be matched to a request
+        request_id = (
+            single_response.get("id")
+            if isinstance(single_response, dict)
+            else None
+        )
+        if type(request_id) is int and 0 <= request_id < len(responses):
+            responses[request_id] = single_response
+
+    missing_methods = [
+        method
+        for (method, _), single_response in zip(methods_and_params, responses)
+        if single_response is None
+    ]
+    if len(missing_methods) > 0:
+        raise ValueError(
+            "Missing responses to a JSON-RPC batch request for : "
+            + ", ".join(missing_methods)
+        )
+    return responses
+
+async def send_rpc_requests_to_eth_client(
+    ethereum_node_url, methods_and_params: list[tuple[str, list | None]]
+) -> list[dict]:
+    return await gather_or_cancel(
+        *(
+            send_rpc_request_to_eth_client(ethereum_node_url, method, params)
+            for method, params in methods_and_params
+        )
+    )
+
+async def get_latest_block_info(ethereum_node_url) -> tuple[str, int, str]:
+    cached = latest_block_info_cache.get(ethereum_node_url)
+    if (
+        cached is not None
+        and time.monotonic() - cached[0] < LATEST_BLOCK_INFO_CACHE_TTL_SECONDS
+    ):
+        return cached[1]
+
+    lock = latest_block_info_locks.setdefault(ethereum_node_url, asyncio.Lock())
+    async with lock:
+        # another request may have refreshed the cache while waiting
+        cached = latest_block_info_cache.get(ethereum_node_url)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0]
+            < LATEST_BLOCK_INFO_CACHE_TTL_SECONDS
+        ):
+            return cached[1]
+
+        latest_block_info = await fetch_latest_block_info(ethereum_node_url)
+        latest_block_info_cache[ethereum_node_url] = (
+            time.monotonic(),
+            latest_block_info,
+        )
+        return latest_block_info
+
+def get_latest_block_hash(ethereum_node_url, block_number: str) -> str | None:
+    # the hash of block_number if it is the latest block fetched from the
+    # eth client, a reorg at the same height changes the hash
+    latest_block = latest_block_hashes.get(ethereum_node_url)
+    if latest_block is not None and latest_block[0] == block_number:
+        return latest_block[1]
+    return None
+
+async def fetch_latest_block_info(ethereum_node_url) -> tuple[str, int, str]:
         raw_res = await send_rpc_request_to_eth_client(
             ethereum_node_url, "eth_getBlockByNumber", ["latest", False]
         )
         latest_block = raw_res["result"]
 
         latest_block_number = latest_block["number"]
+        latest_block_hashes[ethereum_node_url] = (
+            latest_block_number, latest_block["hash"]
+        )
 
         if "baseFeePerGas" in latest_block:
             latest_block_basefee = int(latest_block["baseFeePerGas"], 16)
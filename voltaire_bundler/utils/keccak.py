@@ -0,0 +1,12 @@
+# safe-pysha3 hashes in C without the eth_hash backend dispatch,
+# eth_utils is only used if it is not installed
+try:
+    from sha3 import keccak_256
+
+    def keccak(primitive: bytes) -> bytes:
+        return keccak_256(primitive).digest()
+
+except ImportError:
+    from eth_utils import keccak
+
+__all__ = ["keccak"]